@@ -0,0 +1,60 @@
+"""Benchmark cold-start loading of a menu split across many fragment files.
+
+Generates a menu with FRAGMENTS fragment files of ITEMS items each and
+times the serial loader against the process pool loader for 1..N workers.
+
+    PYTHONPATH=. python benchmarks/bench_parallel_load.py [fragments] [items]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+from terminal_gui.fragments import FragmentCache, load_config_parallel, load_config_with_includes
+
+
+def write_menu(directory: str, fragments: int, items: int) -> str:
+    os.makedirs(os.path.join(directory, "fragments"))
+    for f in range(fragments):
+        with open(os.path.join(directory, "fragments", f"team_{f:04d}.toml"), "w") as file:
+            file.write(f'[[menu]]\nname = "Team {f}"\n')
+            for i in range(items):
+                file.write(
+                    f'[[menu.submenu]]\nname = "Item {i}"\n'
+                    f'command.type = "shell"\ncommand.value = "echo {f} {i}"\n'
+                )
+    main = os.path.join(directory, "menu_config.toml")
+    with open(main, "w") as file:
+        file.write('[menu_structure]\nheading = "Bench"\ninclude = ["fragments/*.toml"]\n')
+    return main
+
+
+def best_of(runs: int, func) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    fragments = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as directory:
+        config = write_menu(directory, fragments, items)
+        # A fresh cache per run so every run is a cold start
+        serial = best_of(3, lambda: load_config_with_includes(config, FragmentCache()))
+        print(f"{fragments} fragments x {items} items, {os.cpu_count()} CPUs")
+        print(f"serial      {serial * 1000:8.1f} ms")
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            elapsed = best_of(3, lambda: load_config_parallel(config, workers, FragmentCache()))
+            print(f"{workers:2d} workers  {elapsed * 1000:8.1f} ms  ({serial / elapsed:4.1f}x)")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
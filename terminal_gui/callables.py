@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import atexit
+import importlib
+import re
+import typing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from .command_executor import OUTPUT_OPTIONS
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+    from typing import Optional
+
+MODES = ("thread", "process")
+DEFAULT_THREAD_WORKERS = 4
+DEFAULT_PROCESS_WORKERS = 2
+# Every key a callable command table may have
+CALLABLE_KEYS = ('type', 'value', 'mode', 'args', 'kwargs') + OUTPUT_OPTIONS
+
+_SPEC = re.compile(r"^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$")
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def callable_problems(command) -> list[tuple[str, str]]:
+    """Return (key, message) pairs for everything wrong with a callable command."""
+    problems = []
+    value = command.get('value')
+    if not isinstance(value, str) or not _SPEC.match(value):
+        problems.append(('value', "must name a function as 'package.module:function'"))
+    if command.get('mode', 'thread') not in MODES:
+        problems.append(('mode', f"must be one of: {', '.join(MODES)}"))
+    if not isinstance(command.get('args', []), list):
+        problems.append(('args', "must be an array"))
+    if not isinstance(command.get('kwargs', {}), dict):
+        problems.append(('kwargs', "must be a table"))
+    if command.get('working_dir') is not None:
+        problems.append(('working_dir', "is not supported for callable commands"))
+    for key in command:
+        # working_dir has its own message above
+        if key not in CALLABLE_KEYS and key != 'working_dir':
+            problems.append((key, f"unknown key for a callable command (expected one of: {', '.join(CALLABLE_KEYS)})"))
+    return problems
+
+
+def resolve_callable(spec: str) -> Callable:
+    """Import ``module:function`` (the function part may be dotted) and return it."""
+    module_name, _, attribute = spec.partition(":")
+    target = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        target = getattr(target, name)
+    if not callable(target):
+        raise TypeError(f"{spec} is not callable")
+    return target
+
+
+def call_spec(spec: str, args: list, kwargs: dict):
+    """Resolve and call *spec*; runs in a worker thread or process."""
+    return resolve_callable(spec)(*args, **kwargs)
+
+
+def _import_modules(modules: list[str]) -> None:
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _noop() -> None:
+    return None
+
+
+def find_callables(structure: dict) -> list[dict]:
+    """Return the command tables of every callable item in a normalized menu structure."""
+    commands = []
+    pending = deque([structure.get('menu', [])])
+    while pending:
+        for item in pending.popleft():
+            if 'submenu' in item:
+                pending.append(item['submenu'])
+            elif item.get('command', {}).get('type') == 'callable':
+                commands.append(item['command'])
+    return commands
+
+
+def warm_process_pool(specs: Iterable[str], max_workers: int = DEFAULT_PROCESS_WORKERS) -> None:
+    """Start the worker processes now, each with the modules of *specs* imported.
+
+    Does nothing when there is nothing to import or the pool already runs.
+    """
+    global _process_pool
+    modules = sorted({spec.partition(":")[0] for spec in specs})
+    if not modules or _process_pool is not None:
+        return
+    _process_pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_import_modules,
+                                        initargs=(modules,))
+    # Workers are started on demand, so give each one something to do
+    for _ in range(max_workers):
+        _process_pool.submit(_noop)
+
+
+def worker_processes() -> int:
+    """Number of live worker processes in the process pool."""
+    pool = _process_pool
+    if pool is None or not pool._processes:
+        return 0
+    return sum(process.is_alive() for process in list(pool._processes.values()))
+
+
+def _pool(mode: str):
+    global _thread_pool, _process_pool
+    if mode == "process":
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=DEFAULT_PROCESS_WORKERS)
+        return _process_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=DEFAULT_THREAD_WORKERS, thread_name_prefix="callable")
+    return _thread_pool
+
+
+def run_callable(
+    spec: str,
+    mode: str = "thread",
+    args: Optional[list] = None,
+    kwargs: Optional[dict] = None,
+    on_progress: Optional[Callable[[str, str], typing.Any]] = None,
+) -> Future:
+    """Call *spec* on the shared thread pool or the warm process pool.
+
+    Returns the call's future. *on_progress* gets ``('result', repr)`` or
+    ``('error', message)`` when it completes.
+    """
+    future = _pool(mode).submit(call_spec, spec, list(args or []), dict(kwargs or {}))
+    if on_progress is not None:
+        on_progress("status", "running")
+
+        def done(future: Future) -> None:
+            try:
+                result = future.result()
+            except Exception as e:
+                on_progress("status", "failed")
+                on_progress("error", f"{type(e).__name__}: {e}")
+            else:
+                on_progress("status", "done")
+                on_progress("result", repr(result))
+
+        future.add_done_callback(done)
+    return future
+
+
+def shutdown_pools() -> None:
+    global _thread_pool, _process_pool
+    for pool in (_thread_pool, _process_pool):
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    _thread_pool = _process_pool = None
+
+
+atexit.register(shutdown_pools)
@@ -1,24 +1,184 @@
 from __future__ import annotations
 
+import codecs
 import os
 import subprocess
-from typing import Optional
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from .metrics import CHILD_PROCESSES, COMMANDS_STARTED, RUNNING_COMMANDS
+
+# Bound at import, so type checks still work while tests patch subprocess.Popen
+_Popen = subprocess.Popen
+
+# Command options that configure the output pane of a streamed command
+OUTPUT_OPTIONS = ('stream', 'max_lines', 'max_bytes', 'scrollback')
+
+
+def command_args(command_type: str, command: str) -> tuple[str | list[str], bool]:
+    """Return the Popen arguments and ``shell`` flag for a simple command."""
+    if command_type == "shell":
+        # Execute shell command
+        return command, True
+    elif command_type == "python":
+        # Execute Python module/script
+        return ["python", "-m"] + command.split(), False
+    elif command_type == "program":
+        # Start a program
+        return command.split(), False
+    raise ValueError(f"Unsupported command type: {command_type}")
+
+
+def _pump_output(process: subprocess.Popen, on_output: Callable[[str], object]) -> None:
+    """Forward a process's output to *on_output* in large chunks until it exits."""
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    fd = process.stdout.fileno()
+    last = ""
+    while chunk := os.read(fd, 65536):
+        text = decoder.decode(chunk)
+        on_output(text)
+        last = text or last
+    text = decoder.decode(b"", final=True)
+    if text:
+        on_output(text)
+        last = text
+    process.stdout.close()
+    status = process.wait()
+    # Terminate a last unfinished line before the exit status
+    newline = "" if not last or last.endswith("\n") else "\n"
+    on_output(f"{newline}[exited with status {status}]\n")
+
+
+def _is_running(handle) -> bool:
+    if isinstance(handle, _Popen):
+        # poll() also reaps children nobody waits for
+        return handle.poll() is None
+    if isinstance(handle, Future):
+        return not handle.done()
+    return handle.running
 
 
 class CommandExecutor:
+    COMMAND_TYPES = ("shell", "python", "program", "pipeline", "remote", "callable")
+    # Command types that report progress through an ``on_progress(key, message)`` callback
+    PROGRESS_TYPES = ("pipeline", "remote", "callable")
+    # When set, commands are checked but not started (used when replaying sessions)
+    dry_run = False
+    # Popens, pipelines and futures of started commands, dropped as they finish
+    _started: set = set()
+    _started_lock = threading.Lock()
+    # Pipeline steps and ssh clients being waited for with subprocess.run
+    _waited = 0
+
+    @staticmethod
+    def _track(handle):
+        with CommandExecutor._started_lock:
+            # Pipelines can't tell us when they finish, so finished ones go here
+            CommandExecutor._started.difference_update(
+                [h for h in CommandExecutor._started if not _is_running(h)]
+            )
+            CommandExecutor._started.add(handle)
+        if isinstance(handle, _Popen):
+            # Waited for so it doesn't linger as a zombie once it exits
+            threading.Thread(target=CommandExecutor._reap, args=(handle,), name="reaper", daemon=True).start()
+        elif isinstance(handle, Future):
+            # Also releases the result, which may hold the output of many hosts
+            handle.add_done_callback(CommandExecutor._forget)
+        return handle
+
+    @staticmethod
+    def _reap(process: subprocess.Popen) -> None:
+        process.wait()
+        CommandExecutor._forget(process)
+
+    @staticmethod
+    def _forget(handle) -> None:
+        with CommandExecutor._started_lock:
+            CommandExecutor._started.discard(handle)
+
     @staticmethod
-    def execute_command(command_type: str, command: str, working_dir: Optional[str] = None) -> None:
-        """Execute a command based on its type."""
+    @contextmanager
+    def waiting_child():
+        """Count the child process run to completion inside the block as running."""
+        with CommandExecutor._started_lock:
+            CommandExecutor._waited += 1
+        try:
+            yield
+        finally:
+            with CommandExecutor._started_lock:
+                CommandExecutor._waited -= 1
+
+    @staticmethod
+    def running() -> list:
+        """Return the handles of started commands that are still running."""
+        with CommandExecutor._started_lock:
+            return [h for h in CommandExecutor._started if _is_running(h)]
+
+    @staticmethod
+    def child_processes() -> int:
+        """Number of child processes still running.
+
+        Counts simple commands, pipeline steps, ssh clients of remote commands
+        and the worker processes of callable commands.
+        """
+        from .callables import worker_processes  # Keep local import to avoid circular import
+        popens = sum(isinstance(handle, _Popen) for handle in CommandExecutor.running())
+        return popens + CommandExecutor._waited + worker_processes()
+
+    @staticmethod
+    def execute_command(command_type: str, command, working_dir: Optional[str] = None, **options):
+        """Execute a command based on its type.
+
+        Simple commands are started and left running. A ``pipeline`` runs in
+        the background and its :class:`~terminal_gui.pipeline.Pipeline` is
+        returned; *options* (``max_workers``, ``on_progress``) are passed to it.
+        A ``remote`` command runs on its ``hosts`` over pooled SSH connections
+        and a future for the per-host results is returned. A ``callable``
+        calls a ``module:function`` on a thread or in a warm worker process
+        (``mode``) and returns its future.
+
+        With an ``on_output`` callback, the output of a simple command is
+        streamed to it from a background thread and the Popen is returned.
+        """
         cwd = working_dir or os.getcwd()
         
-        if command_type == "shell":
-            # Execute shell command
-            subprocess.Popen(command, shell=True, cwd=cwd)
-        elif command_type == "python":
-            # Execute Python module/script
-            subprocess.Popen(["python", "-m"] + command.split(), cwd=cwd)
-        elif command_type == "program":
-            # Start a program
-            subprocess.Popen(command.split(), cwd=cwd)
+        if CommandExecutor.dry_run and command_type in CommandExecutor.COMMAND_TYPES:
+            return None
+        if command_type in CommandExecutor.COMMAND_TYPES:
+            COMMANDS_STARTED.labels(type=command_type).inc()
+
+        if command_type == "pipeline":
+            from .pipeline import Pipeline  # Keep local import to avoid circular import
+            return CommandExecutor._track(Pipeline(command, cwd, **options).start())
+
+        if command_type == "remote":
+            from .remote import default_pool  # Keep local import to avoid circular import
+            hosts = options.pop('hosts')
+            hosts = [hosts] if isinstance(hosts, str) else hosts
+            # working_dir is a path on the remote hosts, not locally
+            return CommandExecutor._track(default_pool().start(hosts, command, working_dir=working_dir, **options))
+
+        if command_type == "callable":
+            from .callables import run_callable  # Keep local import to avoid circular import
+            return CommandExecutor._track(run_callable(command, **options))
+
+        args, shell = command_args(command_type, command)
+        on_output = options.get('on_output')
+        if on_output is not None:
+            process = subprocess.Popen(
+                args, shell=shell, cwd=cwd,
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            )
+            threading.Thread(target=_pump_output, args=(process, on_output), daemon=True).start()
+            return CommandExecutor._track(process)
+        if shell:
+            CommandExecutor._track(subprocess.Popen(args, shell=True, cwd=cwd))
         else:
-            raise ValueError(f"Unsupported command type: {command_type}")
\ No newline at end of file
+            CommandExecutor._track(subprocess.Popen(args, cwd=cwd))
+        return None
+
+
+CHILD_PROCESSES.set_function(CommandExecutor.child_processes)
+RUNNING_COMMANDS.set_function(lambda: len(CommandExecutor.running()))
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import typing
+
+import urwid
+
+from . import metrics
+
+if typing.TYPE_CHECKING:
+    from typing import Optional
+
+DEFAULT_TOGGLE_KEY = "f2"
+REFRESH_INTERVAL = 0.5
+HUD_WIDTH = 44
+
+
+def hud_lines(registry: metrics.MetricsRegistry = metrics.registry) -> list[str]:
+    """Return the HUD's text: the headline numbers of *registry*."""
+    def value(name, **labels):
+        metric = registry.metrics.get(name)
+        return metric.value(**labels) if metric is not None else 0
+
+    def milliseconds(histogram: metrics.Histogram, q: float) -> float:
+        return histogram.quantile(q) * 1000
+
+    frames = registry.metrics["terminal_gui_frame_render_seconds"]
+    latency = registry.metrics["terminal_gui_input_latency_seconds"]
+    built = value("terminal_gui_widgets_built_total", kind="item")
+    submenus = value("terminal_gui_widgets_built_total", kind="submenu")
+    return [
+        f"config load   {value('terminal_gui_config_load_seconds') * 1000:8.1f} ms",
+        f"widgets       {built:8.0f} items {submenus:6.0f} menus",
+        f"  reused      {value('terminal_gui_widgets_reused_total'):8.0f}",
+        f"frame p50/99  {milliseconds(frames, .5):8.2f} {milliseconds(frames, .99):8.2f} ms",
+        f"key   p50/99  {milliseconds(latency, .5):8.2f} {milliseconds(latency, .99):8.2f} ms",
+        f"frames        {frames.count:8d}",
+        f"children      {value('terminal_gui_child_processes'):8.0f} "
+        f"running {value('terminal_gui_running_commands'):4.0f}",
+        f"memory        {value('terminal_gui_resident_memory_bytes') / 2 ** 20:8.1f} MiB",
+    ]
+
+
+class HUDOverlay(urwid.WidgetPlaceholder):
+    """Show *panel* in the top right corner over *widget*.
+
+    Unlike ``urwid.Overlay`` the panel never takes the focus: keys, mouse
+    events and the cursor all stay with *widget*.
+    """
+
+    def __init__(self, widget: urwid.Widget, panel: urwid.Widget) -> None:
+        super().__init__(widget)
+        self.panel = panel
+
+    def render(self, size, focus: bool = False) -> urwid.Canvas:
+        canvas = urwid.CompositeCanvas(self.original_widget.render(size, focus))
+        maxcol, maxrow = size
+        width = min(HUD_WIDTH, maxcol)
+        panel = self.panel.render((width,), False)
+        if panel.rows() <= maxrow:
+            canvas.overlay(urwid.CompositeCanvas(panel), maxcol - width, 0)
+        return canvas
+
+
+class MetricsHUD:
+    """A toggleable panel with live numbers from the metrics registry."""
+
+    def __init__(
+        self,
+        registry: metrics.MetricsRegistry = metrics.registry,
+        toggle_key: str = DEFAULT_TOGGLE_KEY,
+    ) -> None:
+        self.registry = registry
+        self.toggle_key = toggle_key
+        self.text = urwid.Text("")
+        self.panel = urwid.AttrMap(urwid.LineBox(self.text, title="performance"), "heading")
+        self.overlay: Optional[HUDOverlay] = None
+        self._alarm = None
+
+    @property
+    def visible(self) -> bool:
+        return self.overlay is not None
+
+    def handle_key(self, loop: urwid.MainLoop, key) -> bool:
+        """Toggle the HUD if *key* is the toggle key; return whether it was."""
+        if key != self.toggle_key:
+            return False
+        self.toggle(loop)
+        return True
+
+    def toggle(self, loop: urwid.MainLoop) -> None:
+        if self.overlay is not None:
+            loop.widget = self.overlay.original_widget
+            self.overlay = None
+            if self._alarm is not None:
+                loop.remove_alarm(self._alarm)
+                self._alarm = None
+            return
+        self.overlay = HUDOverlay(loop.widget, self.panel)
+        loop.widget = self.overlay
+        self.refresh(loop)
+
+    def refresh(self, loop: urwid.MainLoop, user_data=None) -> None:
+        self.text.set_text("\n".join(hud_lines(self.registry)))
+        if self.overlay is not None:
+            self.overlay._invalidate()
+        self._alarm = loop.set_alarm_in(REFRESH_INTERVAL, self.refresh)
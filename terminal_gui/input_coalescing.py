@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+import typing
+
+import urwid
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+
+DEFAULT_MAX_FPS = 60
+DEFAULT_MAX_REPEAT = 1
+# Keys that only move around; a run of them can be shortened without losing anything typed
+REPEATABLE_KEYS = frozenset(("up", "down", "left", "right", "page up", "page down"))
+# Mouse buttons 4 and 5 are the scroll wheel
+WHEEL_BUTTONS = (4, 5)
+
+
+def _repeat_key(key):
+    """Return what identifies a repeatable event, or ``None`` if it must never be dropped."""
+    if isinstance(key, str):
+        return key if key in REPEATABLE_KEYS else None
+    event, button, _, _ = key
+    if event == "mouse press" and button in WHEEL_BUTTONS:
+        return (event, button)
+    return None
+
+
+class InputCoalescer:
+    """Merge input bursts and cap how often an ``urwid.MainLoop`` redraws.
+
+    :meth:`filter` is the loop's ``input_filter``. It reduces any number of
+    ``window resize`` events in a batch to one, and shortens runs of the
+    same arrow key or scroll-wheel event to at most *max_repeat*. After
+    :meth:`attach`, a redraw requested less than ``1 / max_fps`` seconds after
+    the previous one is put off to the end of the frame, so a burst of input
+    or resizes costs one layout and render pass.
+    """
+
+    def __init__(
+        self,
+        max_fps: float = DEFAULT_MAX_FPS,
+        max_repeat: int = DEFAULT_MAX_REPEAT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_fps <= 0:
+            raise ValueError(f"max_fps must be positive, got {max_fps}")
+        if max_repeat < 1:
+            raise ValueError(f"max_repeat must be at least 1, got {max_repeat}")
+        self.frame_interval = 1 / max_fps
+        self.max_repeat = max_repeat
+        self.clock = clock
+        self.dropped = 0
+        self._last_frame = None
+        self._deferred = None
+
+    def filter(self, keys: list, raw: list) -> list:
+        coalesced = []
+        resized = False
+        run_key, run_length = None, 0
+        for key in keys:
+            if key == "window resize":
+                if resized:
+                    self.dropped += 1
+                    continue
+                resized = True
+                coalesced.append(key)
+                continue
+            repeat = _repeat_key(key)
+            if repeat is not None and repeat == run_key:
+                run_length += 1
+                if run_length > self.max_repeat:
+                    self.dropped += 1
+                    continue
+            else:
+                run_key, run_length = repeat, 1
+            coalesced.append(key)
+        return coalesced
+
+    def attach(self, loop: urwid.MainLoop) -> None:
+        """Cap *loop*'s frame rate by deferring redraws that come too soon."""
+        draw_screen = loop.draw_screen
+
+        def throttled_draw_screen():
+            now = self.clock()
+            if self._last_frame is not None and now - self._last_frame < self.frame_interval:
+                if self._deferred is None:
+                    delay = self.frame_interval - (now - self._last_frame)
+                    self._deferred = loop.set_alarm_in(delay, self._deferred_draw)
+                return
+            if self._deferred is not None:
+                loop.remove_alarm(self._deferred)
+                self._deferred = None
+            self._last_frame = now
+            draw_screen()
+
+        loop.draw_screen = throttled_draw_screen
+
+    def _deferred_draw(self, loop: urwid.MainLoop, user_data=None) -> None:
+        # The loop redraws when it goes idle after this alarm
+        self._deferred = None
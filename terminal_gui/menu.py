@@ -1,28 +1,87 @@
 from __future__ import annotations
 
+import argparse
+import contextlib
+import os
+import time
 import urwid
-from .menu_types import create_simple_menu, create_horizontal_menu, create_cascading_menu
+from .menu_types import WidgetCache, create_simple_menu, create_horizontal_menu, create_cascading_menu
 from .menu_layout import top
-from .utils import exit_program, create_palette, load_menu_config
-from .config import get_menu_colors
+from .utils import exit_program, load_menu_config, attach_main_loop
+from .fragments import FragmentCache
+from .palette import compile_palette, detect_color_depth, resolve_menu_colors
+from .schema import ConfigError, settings_problems, validate_menu_structure
+from .recording import SessionRecorder
+from .callables import find_callables, warm_process_pool
+from .input_coalescing import DEFAULT_MAX_FPS, DEFAULT_MAX_REPEAT, InputCoalescer
+from .prefetch import DEFAULT_BUDGET_MS, Prefetcher
+from .metrics import CONFIG_LOAD_SECONDS, DEFAULT_EXPORT_INTERVAL, MetricsExporter, instrument_loop
+from .hud import DEFAULT_TOGGLE_KEY, MetricsHUD
+
+RELOAD_KEY = 'f5'
 
 class Menu:
-    def __init__(self, config_file):
-        self.config = load_menu_config(config_file)
-        self.menu_type = self.config.get('menu_type', 'simple')
-        self.menu_structure = self.config.get('menu_structure', {})
-        self.menu_colors = get_menu_colors(self.config)
+    def __init__(self, config_file, workers=None):
+        self.config_file = config_file
+        self.workers = workers
+        self.fragments = FragmentCache()
+        # Normalized items and widgets of unchanged fragments survive a reload
+        self.validated = {}
+        self.widgets = WidgetCache()
+        self.config = {}
+        self.menu_type = None
+        self.load()
         self.main = None
         self.menu_stack = []
 
+    def load(self):
+        """Load the config file, re-reading only the fragments that changed.
+
+        Nothing is replaced unless the whole config is valid, so a failed
+        reload leaves the menu as it was.
+        """
+        start = time.perf_counter()
+        config = load_menu_config(self.config_file, self.fragments, self.workers)
+        templates = config.get('templates')
+        if templates != self.config.get('templates'):
+            self.validated.clear()
+        menu_type = config.get('menu_type', 'simple')
+        errors = settings_problems(config)
+        try:
+            menu_structure = validate_menu_structure(
+                config.get('menu_structure', {}), templates=templates, memo=self.validated
+            )
+        except ConfigError as error:
+            raise ConfigError(errors + error.errors) from None
+        if errors:
+            raise ConfigError(errors)
+        menu_colors = resolve_menu_colors(config, os.path.dirname(os.path.abspath(self.config_file)))
+        color_depth = config.get('color_depth') or detect_color_depth()
+        if menu_type != self.menu_type:
+            # Each menu type builds its own kind of widgets
+            self.widgets = WidgetCache()
+        self.config = config
+        self.menu_type = menu_type
+        self.menu_structure = menu_structure
+        self.menu_colors = menu_colors
+        self.color_depth = color_depth
+        self.palette = compile_palette(menu_colors, color_depth)
+        CONFIG_LOAD_SECONDS.set(time.perf_counter() - start)
+
+    def reload(self):
+        """Load the config file again and return the new top widget."""
+        self.load()
+        self.menu_stack = []
+        return self.create_top_widget()
+
     def create_menu(self):
         if self.menu_type == 'simple':
             menu_widget = create_simple_menu(self.menu_structure, self.item_chosen, self.exit_program)
             return menu_widget
         elif self.menu_type == 'cascading':
-            return create_cascading_menu(self.menu_structure)
+            return create_cascading_menu(self.menu_structure, self.widgets)
         elif self.menu_type == 'horizontal':
-            return create_horizontal_menu(self.menu_structure)
+            return create_horizontal_menu(self.menu_structure, self.widgets)
         else:
             raise ValueError(f"Unknown menu type: {self.menu_type}")
 
@@ -57,8 +116,7 @@ class Menu:
                     # Get the current cascading box widget
                     cascading_box = self.main.original_widget.base_widget
                     if cascading_box.box_level > 1:
-                        cascading_box.original_widget = cascading_box.original_widget[0]
-                        cascading_box.box_level -= 1
+                        cascading_box.close_box()
                     else:
                         raise urwid.ExitMainLoop()
                 except (IndexError, AttributeError):
@@ -76,18 +134,17 @@ class Menu:
     def exit_program(self, button=None):
         raise urwid.ExitMainLoop()
 
-def main():
-    menu = Menu('menu_config.toml')
-    menu_widget = menu.create_menu()
-    
-    if menu.menu_type == 'cascading':
-        # For cascading menu, don't add extra padding/overlay
-        top_widget = menu_widget
-    else:
+    def create_top_widget(self):
+        """Build the menu and wrap it the way it is shown on screen."""
+        menu_widget = self.create_menu()
+
+        if self.menu_type == 'cascading':
+            # For cascading menu, don't add extra padding/overlay
+            return menu_widget
         # For other menu types, use the original padding and overlay
-        menu.main = urwid.Padding(menu_widget, left=2, right=2)
-        top_widget = urwid.Overlay(
-            menu.main,
+        self.main = urwid.Padding(menu_widget, left=2, right=2)
+        return urwid.Overlay(
+            self.main,
             urwid.SolidFill(u'\N{MEDIUM SHADE}'),
             align='center',
             width=('relative', 60),
@@ -96,9 +153,117 @@ def main():
             min_width=20,
             min_height=9
         )
-    
-    palette = create_palette(menu.menu_colors)
-    urwid.MainLoop(top_widget, palette=palette, unhandled_input=menu.keypress).run()
+
+def error_popup(message, widget, show):
+    """Return *message* in a box over *widget*; its Ok button calls ``show(widget)``."""
+    done = urwid.Button(u'Ok')
+    urwid.connect_signal(done, 'click', lambda button: show(widget))
+    body = urwid.Pile([urwid.Text(message), urwid.Divider(), urwid.AttrMap(done, None, focus_map='reversed')])
+    return urwid.Overlay(
+        urwid.LineBox(urwid.Filler(body, valign='top'), title='Reload failed'),
+        widget,
+        align='center',
+        width=('relative', 80),
+        valign='middle',
+        height=('relative', 60),
+        min_width=20,
+        min_height=9
+    )
+
+def positive(convert):
+    """Return an argparse ``type`` that converts with *convert* and requires a value above 0."""
+    def parse(text):
+        try:
+            value = convert(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid {convert.__name__} value: {text!r}") from None
+        if value <= 0:
+            raise argparse.ArgumentTypeError(f"must be positive, got {text}")
+        return value
+    return parse
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='terminal-gui')
+    parser.add_argument('config', nargs='?', default='menu_config.toml', help='menu config file')
+    parser.add_argument('--workers', type=int, help='parse config fragments in this many processes')
+    parser.add_argument('--record', metavar='FILE', help='record keypresses and frame times to FILE')
+    parser.add_argument('--max-fps', type=positive(float),
+                        help=f'frame rate cap (default: config max_fps or {DEFAULT_MAX_FPS})')
+    parser.add_argument('--max-repeat', type=positive(int),
+                        help=f'arrow key or scroll events of one kind kept per frame '
+                             f'(default: config max_repeat or {DEFAULT_MAX_REPEAT})')
+    parser.add_argument('--prefetch-budget', type=float, metavar='MS',
+                        help=f'idle time slice for building submenus ahead, 0 to disable '
+                             f'(default: config prefetch_budget_ms or {DEFAULT_BUDGET_MS})')
+    parser.add_argument('--metrics-file', metavar='FILE',
+                        help='write Prometheus metrics to FILE every few seconds (default: config metrics_file)')
+    parser.add_argument('--metrics-socket', metavar='PATH',
+                        help='serve Prometheus metrics on a unix socket (default: config metrics_socket)')
+    args = parser.parse_args(argv)
+
+    menu = Menu(args.config, workers=args.workers)
+    coalescer = InputCoalescer(
+        args.max_fps or menu.config.get('max_fps', DEFAULT_MAX_FPS),
+        args.max_repeat or menu.config.get('max_repeat', DEFAULT_MAX_REPEAT),
+    )
+    hud = MetricsHUD(toggle_key=menu.config.get('hud_key', DEFAULT_TOGGLE_KEY))
+
+    def show(widget):
+        # Under the HUD while it is shown, so it stays on top
+        if hud.visible:
+            hud.overlay.original_widget = widget
+        else:
+            loop.widget = widget
+
+    def reload():
+        try:
+            widget = menu.reload()
+        except (OSError, ValueError) as error:
+            show(error_popup(str(error), hud.overlay.original_widget if hud.visible else loop.widget, show))
+            return
+        loop.screen.register_palette(menu.palette)
+        show(widget)
+        loop.screen.clear()
+
+    def unhandled_input(key):
+        if hud.handle_key(loop, key):
+            return True
+        if key == RELOAD_KEY:
+            reload()
+            return True
+        return menu.keypress(key)
+
+    loop = urwid.MainLoop(
+        menu.create_top_widget(),
+        palette=menu.palette,
+        unhandled_input=unhandled_input,
+        input_filter=coalescer.filter,
+    )
+    loop.screen.set_terminal_properties(colors=menu.color_depth)
+    attach_main_loop(loop)
+    prefetch_budget = args.prefetch_budget
+    if prefetch_budget is None:
+        prefetch_budget = menu.config.get('prefetch_budget_ms', DEFAULT_BUDGET_MS)
+    if prefetch_budget:
+        Prefetcher(prefetch_budget).attach(loop)
+    warm_process_pool(
+        command['value'] for command in find_callables(menu.menu_structure)
+        if command.get('mode') == 'process'
+    )
+    instrument_loop(loop)
+    with contextlib.ExitStack() as stack:
+        if args.record:
+            recorder = stack.enter_context(SessionRecorder(args.record, args.config, menu.menu_type))
+            recorder.attach(loop)
+        exporter = stack.enter_context(MetricsExporter(
+            args.metrics_file or menu.config.get('metrics_file'),
+            args.metrics_socket or menu.config.get('metrics_socket'),
+            menu.config.get('metrics_interval', DEFAULT_EXPORT_INTERVAL),
+        ))
+        exporter.attach(loop)
+        # Attached last so only frames that are really drawn are timed and recorded
+        coalescer.attach(loop)
+        loop.run()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import time
 import typing
+from functools import lru_cache
+
 import urwid
-from .utils import exit_program
-from .command_executor import CommandExecutor
+from .utils import exit_program, call_in_ui
+from .command_executor import OUTPUT_OPTIONS, CommandExecutor
+from .metrics import SUBMENUS_BUILT
+from .output_buffer import DEFAULT_MAX_BYTES, DEFAULT_MAX_LINES, OutputBuffer, OutputPane
 
 if typing.TYPE_CHECKING:
     from collections.abc import Callable, Hashable, Iterable
@@ -11,6 +16,16 @@ if typing.TYPE_CHECKING:
 
 focus_map = {"heading": "focus heading", "options": "focus options", "line": "focus line"}
 
+def _caption_widget(caption) -> urwid.AttrMap:
+    return urwid.AttrMap(
+        urwid.SelectableIcon(["  \N{BULLET} ", caption], 2),
+        None,
+        "selected",
+    )
+
+# Captions are stateless, so buttons with the same text share one (laid out once)
+_shared_caption_widget = lru_cache(maxsize=4096)(_caption_widget)
+
 class MenuButton(urwid.Button):
     def __init__(
         self,
@@ -18,11 +33,49 @@ class MenuButton(urwid.Button):
         callback: Callable[[MenuButton], typing.Any],
     ) -> None:
         super().__init__("", on_press=callback)
-        self._w = urwid.AttrMap(
-            urwid.SelectableIcon(["  \N{BULLET} ", caption], 2),
-            None,
-            "selected",
-        )
+        if isinstance(caption, list):
+            self._w = _caption_widget(caption)
+        else:
+            self._w = _shared_caption_widget(caption)
+
+class LazyMenu:
+    """A submenu's widget tree, built on first use or ahead of time in steps.
+
+    *choices* is consumed one widget at a time, so passing a generator
+    spreads the building over several :meth:`step` calls; *assemble* turns
+    the finished list of choices into the menu widget.
+    """
+
+    def __init__(
+        self,
+        choices: Iterable[urwid.Widget],
+        assemble: Callable[[list[urwid.Widget]], urwid.Widget],
+    ) -> None:
+        self._choices = iter(choices)
+        self._built: list[urwid.Widget] = []
+        self._assemble = assemble
+        self._widget: Optional[urwid.Widget] = None
+
+    @property
+    def done(self) -> bool:
+        return self._widget is not None
+
+    def step(self, deadline: float, clock: Callable[[], float] = time.perf_counter) -> bool:
+        """Build choices until *clock* passes *deadline*; return whether the menu is complete."""
+        if self._widget is None:
+            for choice in self._choices:
+                self._built.append(choice)
+                if clock() >= deadline:
+                    return False
+            self._widget = self._assemble(self._built)
+            self._built = []
+            SUBMENUS_BUILT.inc()
+        return True
+
+    def get(self) -> urwid.Widget:
+        """Return the menu widget, finishing the build first if needed."""
+        self.step(float("inf"))
+        return self._widget
 
 class SubMenu(urwid.WidgetWrap[MenuButton]):
     def __init__(
@@ -30,13 +83,17 @@ class SubMenu(urwid.WidgetWrap[MenuButton]):
         caption: str | tuple[Hashable, str],
         choices: Iterable[urwid.Widget],
     ) -> None:
-        from .menu_layout import top  # Keep local import to avoid circular import
         super().__init__(MenuButton([caption, "\N{HORIZONTAL ELLIPSIS}"], self.open_menu))
+        self.caption = caption
+        # Built when first opened (or prefetched), a generator of choices keeps it lazy
+        self.lazy_menu = LazyMenu(choices, self._assemble)
+
+    def _assemble(self, choices: list[urwid.Widget]) -> urwid.AttrMap:
         line = urwid.Divider("\N{LOWER ONE QUARTER BLOCK}")
         listbox = urwid.ListBox(
             urwid.SimpleFocusListWalker(
                 [
-                    urwid.AttrMap(urwid.Text(["\n  ", caption]), "heading"),
+                    urwid.AttrMap(urwid.Text(["\n  ", self.caption]), "heading"),
                     urwid.AttrMap(line, "line"),
                     urwid.Divider(),
                     *choices,
@@ -44,7 +101,11 @@ class SubMenu(urwid.WidgetWrap[MenuButton]):
                 ]
             )
         )
-        self.menu = urwid.AttrMap(listbox, "options")
+        return urwid.AttrMap(listbox, "options")
+
+    @property
+    def menu(self) -> urwid.AttrMap:
+        return self.lazy_menu.get()
 
     def open_menu(self, button: MenuButton) -> None:
         from .menu_layout import top  # Keep local import to avoid circular import
@@ -65,30 +126,99 @@ class Choice(urwid.WidgetWrap[MenuButton]):
         response_box = urwid.Filler(urwid.Pile([response, done]))
         top.open_box(urwid.AttrMap(response_box, "options"))
 
+class CommandProgress(urwid.WidgetWrap[urwid.Pile]):
+    """Live status lines for a running command, one per key (e.g. pipeline step)."""
+
+    def __init__(self) -> None:
+        super().__init__(urwid.Pile([]))
+        self.lines: dict[str, urwid.Text] = {}
+
+    def report(self, key: str, message: str) -> None:
+        """Set the line for *key*; safe to call from worker threads."""
+        call_in_ui(self._set_line, key, message)
+
+    def _set_line(self, key: str, message: str) -> None:
+        line = self.lines.get(key)
+        if line is None:
+            line = self.lines[key] = urwid.Text("")
+            self._w.contents.append((line, self._w.options()))
+        line.set_text(f"  {key}: {message}")
+
+def describe_command(command_type: str, command) -> str:
+    if command_type == "pipeline":
+        return f"pipeline of {len(command)} steps"
+    return str(command)
+
+def start_command(
+    command_type: str,
+    command,
+    working_dir: Optional[str] = None,
+    options: Optional[dict] = None,
+) -> tuple[str, Optional[urwid.Widget]]:
+    """Execute a command and return a status message and its live output widget, if any.
+
+    The widget is a :class:`CommandProgress` for commands that report
+    progress, or an :class:`OutputPane` for commands with ``stream = true``.
+    """
+    options = dict(options or {})
+    output_options = {key: options.pop(key) for key in OUTPUT_OPTIONS if key in options}
+    progress = None
+    if command_type in CommandExecutor.PROGRESS_TYPES:
+        progress = CommandProgress()
+        options['on_progress'] = progress.report
+    elif output_options.get('stream'):
+        progress = OutputPane(OutputBuffer(
+            max_lines=output_options.get('max_lines', DEFAULT_MAX_LINES),
+            max_bytes=output_options.get('max_bytes', DEFAULT_MAX_BYTES),
+            spill=output_options.get('scrollback', False),
+        ))
+        options['on_output'] = progress.write
+    try:
+        CommandExecutor.execute_command(command_type, command, working_dir, **options)
+    except Exception as e:
+        return f"Error executing command: {str(e)}", None
+    return f"Executing command: {describe_command(command_type, command)}", progress
+
+class OutputBox(urwid.Pile):
+    """A command's response, streamed output and Ok button, stacked."""
+
+    def __init__(self, response: urwid.Widget, output: OutputPane, done: urwid.Widget) -> None:
+        # The output pane scrolls, so it gets all the room left over
+        super().__init__([("pack", response), output, ("pack", done)])
+        self.output = output
+
+    def dismissed(self) -> None:
+        """Called by the layouts once the box is gone for good; frees the output's scrollback."""
+        self.output.close()
+
+def response_box(response: urwid.Widget, output: Optional[urwid.Widget], done: urwid.Widget) -> urwid.Widget:
+    """Stack a command's response, live output and Ok button into one box."""
+    if isinstance(output, OutputPane):
+        return OutputBox(response, output, done)
+    widgets = [response, output, done] if output else [response, done]
+    return urwid.Filler(urwid.Pile(widgets))
+
 class CommandChoice(Choice):
     def __init__(
         self,
         caption: str | tuple[Hashable, str] | list[str | tuple[Hashable, str]],
         command_type: str,
-        command: str,
+        command,
         working_dir: Optional[str] = None,
+        options: Optional[dict] = None,
     ) -> None:
         super().__init__(caption)
         self.command_type = command_type
         self.command = command
         self.working_dir = working_dir
+        self.options = options or {}
 
     def item_chosen(self, button: MenuButton) -> None:
         from .menu_layout import top  # Keep local import to avoid circular import
         
         # Execute the command
-        try:
-            CommandExecutor.execute_command(self.command_type, self.command, self.working_dir)
-            message = f"  Executing command: {self.command}\n"
-        except Exception as e:
-            message = f"  Error executing command: {str(e)}\n"
+        message, progress = start_command(self.command_type, self.command, self.working_dir, self.options)
         
-        response = urwid.Text([message])
+        response = urwid.Text([f"  {message}\n"])
         done = MenuButton("Ok", exit_program)
-        response_box = urwid.Filler(urwid.Pile([response, done]))
-        top.open_box(urwid.AttrMap(response_box, "options"))
\ No newline at end of file
+        top.open_box(urwid.AttrMap(response_box(response, progress, done), "options"))
\ No newline at end of file
@@ -5,6 +5,12 @@ from .utils import exit_program
 
 focus_map = {"heading": "focus heading", "options": "focus options", "line": "focus line"}
 
+def dismiss(box: urwid.Widget) -> None:
+    """Tell a box that left the layout for good, e.g. a command's output, to free what it holds."""
+    dismissed = getattr(box.base_widget, 'dismissed', None)
+    if dismissed is not None:
+        dismissed()
+
 class HorizontalBoxes(urwid.Columns):
     def __init__(self) -> None:
         super().__init__([], dividechars=1)
@@ -22,10 +28,24 @@ class HorizontalBoxes(urwid.Columns):
         )
         self.focus_position = len(self.contents) - 1
 
+    def reset(self) -> None:
+        """Close every open box."""
+        boxes = {id(box): box for contents in [self.contents, *self.menu_stack] for box, _ in contents}
+        del self.contents[:]
+        self.menu_stack = []
+        for box in boxes.values():
+            dismiss(box)
+
     def go_back(self) -> None:
         if self.menu_stack:
+            closed = list(self.contents)
             self.contents[:] = self.menu_stack.pop()
             self.focus_position = len(self.contents) - 1
+            # Boxes kept by an earlier step back can still come back
+            kept = {id(box) for contents in [self.contents, *self.menu_stack] for box, _ in contents}
+            for box, _ in closed:
+                if id(box) not in kept:
+                    dismiss(box)
         else:
             exit_program()  # Use imported exit_program instead of raising directly
 
@@ -54,6 +74,13 @@ class CascadingBoxes(urwid.WidgetPlaceholder):
         )
         self.box_level += 1
 
+    def close_box(self) -> None:
+        """Close the innermost box and show the one under it."""
+        closed = self.original_widget.top_w
+        self.original_widget = self.original_widget[0]
+        self.box_level -= 1
+        dismiss(closed)
+
     def get_innermost_widget(self, widget):
         """Unwrap widget until we get to the actual content"""
         while hasattr(widget, 'original_widget'):
@@ -63,8 +90,7 @@ class CascadingBoxes(urwid.WidgetPlaceholder):
     def keypress(self, size, key: str) -> str | None:
         # Handle back navigation
         if key in ("esc", "left") and self.box_level > 1:
-            self.original_widget = self.original_widget[0]
-            self.box_level -= 1
+            self.close_box()
             return None
 
         current_box = self.get_innermost_widget(self.original_widget)
@@ -4,8 +4,9 @@ import typing
 import urwid
 from collections.abc import Callable, Hashable, Iterable
 
-from .menu_components import SubMenu, Choice, CommandChoice
+from .menu_components import LazyMenu, SubMenu, Choice, CommandChoice, start_command, response_box
 from .menu_layout import CascadingBoxes, top
+from .metrics import ITEMS_BUILT, WIDGETS_REUSED
 from .utils import exit_program
 
 def create_simple_menu(structure, item_chosen_callback, exit_callback):
@@ -19,30 +20,92 @@ def create_simple_menu(structure, item_chosen_callback, exit_callback):
     body.append(urwid.AttrMap(exit_button, None, focus_map='reversed'))
     return urwid.ListBox(urwid.SimpleFocusListWalker(body))
 
-def create_menu_item(item):
+COMMAND_KEYS = ('type', 'value', 'working_dir')
+
+def command_options(command):
+    """Return the extra settings of a command table (e.g. a pipeline's max_workers)."""
+    return {key: value for key, value in command.items() if key not in COMMAND_KEYS}
+
+class WidgetCache:
+    """The widgets built for normalized items, kept from one build to the next.
+
+    Entries are keyed on the item dict, which validation shares between
+    identical items and keeps across reloads for unchanged fragments, so
+    such items get the widget built the first time. :meth:`sweep` at the
+    start of each build drops the widgets the previous build didn't use.
+    """
+
+    def __init__(self) -> None:
+        self._widgets = {}
+        self._used = {}
+
+    def get(self, item):
+        entry = self._used.get(id(item)) or self._widgets.get(id(item))
+        if entry is None or entry[0] is not item:
+            return None
+        self._used[id(item)] = entry
+        WIDGETS_REUSED.inc()
+        return entry[1]
+
+    def put(self, item, widget):
+        # Keep the item alive so its id can't be reused by another one
+        self._used[id(item)] = (item, widget)
+        return widget
+
+    def sweep(self) -> None:
+        self._widgets = self._used
+        self._used = {}
+
+    def __len__(self) -> int:
+        return len(self._widgets.keys() | self._used.keys())
+
+def create_menu_item(item, cache=None):
+    """Build the widget for a leaf item.
+
+    With a :class:`WidgetCache`, an item seen before gets the widget built
+    the first time. Leaf widgets hold no per-position state, so one can sit
+    in any number of submenus.
+    """
+    if cache is not None:
+        widget = cache.get(item)
+        if widget is not None:
+            return widget
     if 'command' in item:
-        return CommandChoice(
+        widget = CommandChoice(
             item['name'],
             item['command']['type'],
             item['command']['value'],
-            item['command'].get('working_dir')
+            item['command'].get('working_dir'),
+            command_options(item['command'])
         )
-    return Choice(item['name'])
-
-def create_horizontal_menu(structure):
+    else:
+        widget = Choice(item['name'])
+    ITEMS_BUILT.inc()
+    if cache is not None:
+        cache.put(item, widget)
+    return widget
+
+def create_horizontal_menu(structure, cache=None):
     choices = []
+    if cache is None:
+        cache = WidgetCache()
+    cache.sweep()
     for item in structure['menu']:
         if 'submenu' in item:
-            submenu_choices = [create_menu_item(subitem) for subitem in item['submenu']]
-            submenu = SubMenu(item['name'], submenu_choices)
+            submenu = cache.get(item)
+            if submenu is None:
+                # A generator, so the submenu is built when opened or prefetched
+                submenu_choices = (create_menu_item(subitem, cache) for subitem in item['submenu'])
+                submenu = cache.put(item, SubMenu(item['name'], submenu_choices))
             choices.append(submenu)
         else:
-            choices.append(create_menu_item(item))
+            choices.append(create_menu_item(item, cache))
     menu_top = SubMenu(structure['heading'], choices)
+    top.reset()
     top.open_box(menu_top.menu)
     return top
 
-def create_cascading_menu(structure):
+def create_cascading_menu(structure, cache=None):
     class MenuButton(urwid.Button):
         def __init__(self, caption, callback):
             super().__init__("")
@@ -66,12 +129,13 @@ def create_cascading_menu(structure):
         caption: str | tuple[Hashable, str] | list[str | tuple[Hashable, str]],
         choices: Iterable[urwid.Widget],
     ) -> urwid.Widget:
-        contents = menu(caption, choices)
+        contents = LazyMenu(choices, lambda built: menu(caption, built))
 
         def open_menu(button: urwid.Button) -> None:
-            top.open_box(contents)
+            top.open_box(contents.get())
 
         button = MenuButton([caption, " ..."], open_menu)
+        button.lazy_menu = contents
         return urwid.AttrMap(button, 'options', focus_map='focus_options')
 
     class MenuListBox(urwid.ListBox):
@@ -133,24 +197,26 @@ def create_cascading_menu(structure):
         done = menu_button("Ok", exit_program)
         top.open_box(urwid.Filler(urwid.Pile([response, done])))
 
+    # Interned items share one button, see create_menu_item
+    if cache is None:
+        cache = WidgetCache()
+    cache.sweep()
+
     def build_menu(structure):
-        choices = []
+        # A generator, so nested submenus are only built when opened or prefetched
         for item in structure['menu']:
-            if 'submenu' in item:
-                submenu = sub_menu(item['name'], build_menu({'menu': item['submenu']}))
-                choices.append(submenu)
+            widget = cache.get(item)
+            if widget is not None:
+                yield widget
+            elif 'submenu' in item:
+                yield cache.put(item, sub_menu(item['name'], build_menu({'menu': item['submenu']})))
             elif 'command' in item:
-                def make_command_callback(cmd_type, cmd, work_dir):
+                def make_command_callback(cmd_type, cmd, work_dir, options):
                     def callback(button):
-                        try:
-                            from .command_executor import CommandExecutor
-                            CommandExecutor.execute_command(cmd_type, cmd, work_dir)
-                            message = f"Executing command: {cmd}"
-                        except Exception as e:
-                            message = f"Error executing command: {str(e)}"
+                        message, progress = start_command(cmd_type, cmd, work_dir, options)
                         response = urwid.Text([message, "\n"])
                         done = menu_button("Ok", exit_program)
-                        top.open_box(urwid.Filler(urwid.Pile([response, done])))
+                        top.open_box(response_box(response, progress, done))
                     return callback
 
                 cmd = item['command']
@@ -159,14 +225,15 @@ def create_cascading_menu(structure):
                     make_command_callback(
                         cmd['type'],
                         cmd['value'],
-                        cmd.get('working_dir')
+                        cmd.get('working_dir'),
+                        command_options(cmd)
                     )
                 )
-                choices.append(command_button)
+                ITEMS_BUILT.inc()
+                yield cache.put(item, command_button)
             else:
-                choices.append(menu_button(item['name'], item_chosen))
-
-        return choices
+                ITEMS_BUILT.inc()
+                yield cache.put(item, menu_button(item['name'], item_chosen))
 
     menu_top = menu(structure['heading'], build_menu(structure))
     return CascadingBoxes(menu_top)
\ No newline at end of file
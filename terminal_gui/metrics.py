@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import math
+import os
+import socket
+import stat
+import threading
+import time
+import typing
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from typing import Optional
+
+    import urwid
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DEFAULT_EXPORT_INTERVAL = 5
+
+
+def _format_labels(names: Sequence[str], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Child:
+    """One label combination of a metric, bound ahead of time so updates skip the label lookup."""
+
+    __slots__ = ('metric', 'key')
+
+    def __init__(self, metric, key: tuple) -> None:
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount: float = 1) -> None:
+        self.metric._add(self.key, amount)
+
+
+class _GaugeChild(_Child):
+    """A label combination of a gauge, which can also be set."""
+
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.metric._set(self.key, value)
+
+
+class _Metric:
+    kind = ""
+    child = _Child
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # Unlabelled metrics are exported as 0 before their first update
+        self._values: dict[tuple, float] = {} if self.labelnames else {(): 0}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: str) -> _Child:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return self.child(self, tuple(str(labels[name]) for name in self.labelnames))
+
+    def _add(self, key: tuple, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        """Return (name suffix, labels, value) for each exported sample."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [("", _format_labels(self.labelnames, key), value) for key, value in values]
+
+
+class Counter(_Metric):
+    """A count that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1) -> None:
+        self._add((), amount)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, set directly or read from a function when exported."""
+
+    kind = "gauge"
+    child = _GaugeChild
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._set((), value)
+
+    def _set(self, key: tuple, value: float) -> None:
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1) -> None:
+        self._add((), amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def value(self, **labels: str) -> float:
+        if self._function is not None:
+            return self._function()
+        return super().value(**labels)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        if self._function is not None:
+            return [("", "", self._function())]
+        return super().samples()
+
+
+class Histogram(_Metric):
+    """Counts of observations in cumulative buckets, plus their sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate the *q* quantile by interpolating inside its bucket, like PromQL does."""
+        with self._lock:
+            counts, total = list(self._counts), self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and seen + count >= rank:
+                if bound == math.inf:
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound if bound != math.inf else lower
+        return lower
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        with self._lock:
+            counts, total, value_sum = list(self._counts), self.count, self.sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            samples.append(("_bucket", _format_labels((), (), f'le="{_format_value(bound)}"'), cumulative))
+        samples.append(("_sum", "", value_sum))
+        samples.append(("_count", "", total))
+        return samples
+
+
+class MetricsRegistry:
+    """The metrics of one process, exportable in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, buckets))
+
+    def exposition(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Write :meth:`exposition` to *path*, atomically so readers never see half a file."""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w') as file:
+            file.write(self.exposition())
+        os.replace(temporary, path)
+
+
+def resident_memory_bytes() -> float:
+    """Current resident set size, or the peak where the current one can't be read."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+registry = MetricsRegistry()
+
+CONFIG_LOAD_SECONDS = registry.gauge(
+    "terminal_gui_config_load_seconds", "Time to load, validate and compile the menu config")
+WIDGETS_BUILT = registry.counter(
+    "terminal_gui_widgets_built_total", "Menu widgets built, by kind", ("kind",))
+WIDGETS_REUSED = registry.counter(
+    "terminal_gui_widgets_reused_total", "Menu item widgets shared with an identical item instead of built")
+FRAME_RENDER_SECONDS = registry.histogram(
+    "terminal_gui_frame_render_seconds", "Time to render and draw one frame")
+INPUT_LATENCY_SECONDS = registry.histogram(
+    "terminal_gui_input_latency_seconds", "Time from an input batch to the end of the frame showing it")
+COMMANDS_STARTED = registry.counter(
+    "terminal_gui_commands_started_total", "Commands started, by type", ("type",))
+CHILD_PROCESSES = registry.gauge(
+    "terminal_gui_child_processes",
+    "Child processes still running: commands, pipeline steps, ssh clients and callable workers")
+RUNNING_COMMANDS = registry.gauge(
+    "terminal_gui_running_commands", "Started commands still running, including pipelines and remote commands")
+RESIDENT_MEMORY_BYTES = registry.gauge(
+    "terminal_gui_resident_memory_bytes", "Resident memory of the menu process")
+RESIDENT_MEMORY_BYTES.set_function(resident_memory_bytes)
+
+ITEMS_BUILT = WIDGETS_BUILT.labels(kind="item")
+SUBMENUS_BUILT = WIDGETS_BUILT.labels(kind="submenu")
+
+
+def instrument_loop(loop: urwid.MainLoop) -> None:
+    """Time *loop*'s frames and the latency from each input batch to the frame showing it."""
+    process_input = loop.process_input
+    draw_screen = loop.draw_screen
+    pending: list[float] = []
+
+    def timed_process_input(keys):
+        if not pending:
+            pending.append(time.perf_counter())
+        return process_input(keys)
+
+    def timed_draw_screen():
+        start = time.perf_counter()
+        draw_screen()
+        end = time.perf_counter()
+        FRAME_RENDER_SECONDS.observe(end - start)
+        if pending:
+            INPUT_LATENCY_SECONDS.observe(end - pending.pop())
+
+    loop.process_input = timed_process_input
+    loop.draw_screen = timed_draw_screen
+
+
+class MetricsServer:
+    """Serve the registry on a unix socket, one exposition per connection.
+
+    A client that sends an HTTP request gets an HTTP response, so
+    ``curl --unix-socket PATH http://localhost/metrics`` works; any other
+    client just reads the text.
+    """
+
+    def __init__(self, path: str, metrics: MetricsRegistry = registry) -> None:
+        self.path = path
+        self.registry = metrics
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            # A stale socket from an earlier run is replaced, anything else is left alone
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"Not replacing {path} with the metrics socket: it is not a socket")
+            os.unlink(path)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.bind(path)
+        self.socket.listen(8)
+        self._inode = os.lstat(path).st_ino
+        self._thread = threading.Thread(target=self._serve, name="metrics", daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                connection, _ = self.socket.accept()
+            except OSError:
+                return  # Closed
+            with connection:
+                try:
+                    self._answer(connection)
+                except OSError:
+                    pass
+
+    def _answer(self, connection: socket.socket) -> None:
+        connection.settimeout(0.2)
+        try:
+            request = connection.recv(4096)
+        except (socket.timeout, OSError):
+            request = b""
+        body = self.registry.exposition().encode()
+        if request.startswith(b"GET "):
+            header = (
+                "HTTP/1.0 200 OK\r\n"
+                "Content-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            )
+            connection.sendall(header.encode() + body)
+        else:
+            connection.sendall(body)
+
+    def close(self) -> None:
+        self.socket.close()
+        try:
+            info = os.lstat(self.path)
+        except FileNotFoundError:
+            return
+        # Only remove our own socket, not whatever replaced it since
+        if stat.S_ISSOCK(info.st_mode) and info.st_ino == self._inode:
+            os.unlink(self.path)
+
+
+class MetricsExporter:
+    """Export the registry to a file every *interval* seconds and/or on a unix socket."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        socket_path: Optional[str] = None,
+        interval: float = DEFAULT_EXPORT_INTERVAL,
+        metrics: MetricsRegistry = registry,
+    ) -> None:
+        self.path = path
+        self.socket_path = socket_path
+        self.interval = interval
+        self.registry = metrics
+        self.server: Optional[MetricsServer] = None
+
+    def __enter__(self) -> MetricsExporter:
+        if self.socket_path:
+            self.server = MetricsServer(self.socket_path, self.registry)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def attach(self, loop: urwid.MainLoop) -> None:
+        if self.path:
+            self._write(loop)
+
+    def _write(self, loop: urwid.MainLoop, user_data=None) -> None:
+        self.registry.write_textfile(self.path)
+        loop.set_alarm_in(self.interval, self._write)
+
+    def close(self) -> None:
+        if self.path:
+            # The final numbers, covering the whole session
+            self.registry.write_textfile(self.path)
+        if self.server is not None:
+            self.server.close()
+            self.server = None
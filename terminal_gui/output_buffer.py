@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import mmap
+import tempfile
+import threading
+import typing
+from array import array
+from collections import deque
+
+import urwid
+
+from .utils import call_in_ui
+
+if typing.TYPE_CHECKING:
+    from typing import Optional
+
+DEFAULT_MAX_LINES = 10_000
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_SPILL_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_PENDING = 1024 * 1024
+
+
+class _SpillFile:
+    """Append-only store of evicted lines in a temporary file, read back through mmap."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.file = tempfile.TemporaryFile()
+        self.offsets = array('Q', [0])  # offsets[i]..offsets[i + 1] is line i
+        self.first = 0  # number of lines dropped from the front
+        self._map: Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def append(self, lines: list[str]) -> None:
+        encoded = [line.encode("utf-8", "replace") for line in lines]
+        self.file.seek(0, 2)
+        self.file.write(b"\n".join(encoded) + b"\n")
+        end = self.offsets[-1]
+        for line in encoded:
+            end += len(line) + 1
+            self.offsets.append(end)
+        if end - self.offsets[0] > self.max_bytes:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop the older half of the spilled lines."""
+        keep_from = len(self) // 2
+        start = self.offsets[keep_from]
+        self._close_map()
+        self.file.flush()
+        self.file.seek(start)
+        rest = self.file.read()
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(rest)
+        self.offsets = array('Q', (offset - start for offset in self.offsets[keep_from:]))
+        self.first += keep_from
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        if self._map is None or len(self._map) < end:
+            self._close_map()
+            self.file.flush()
+            self._map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map[start:end - 1].decode("utf-8", "replace")
+
+    def close(self) -> None:
+        self._close_map()
+        self.file.close()
+
+
+class OutputBuffer:
+    """Bounded line store for command output.
+
+    At most *max_lines* lines and *max_bytes* of text (counted in
+    characters) are kept in memory. With *spill* enabled, lines pushed out
+    of memory go to a temporary file for scrollback (itself capped at
+    *max_spill_bytes*); otherwise they are dropped. Lines are addressed by
+    absolute line number, so positions stay valid as old lines go away. A
+    line longer than *max_bytes* is cut into pieces that fit.
+
+    :meth:`write` may be called from any thread and only queues text.
+    Queued text is moved into the buffer by :meth:`flush` in the UI thread,
+    which is scheduled at most once per pending batch, so a fast producer
+    costs one update per frame rather than one per line. Once *max_pending*
+    characters are queued, writers in other threads wait for the next flush,
+    which in turn stalls the command on its full pipe.
+
+    :meth:`close` releases the spill file; text written after it is dropped.
+    """
+
+    def __init__(
+        self,
+        max_lines: int = DEFAULT_MAX_LINES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        spill: bool = False,
+        max_spill_bytes: int = DEFAULT_MAX_SPILL_BYTES,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        on_flush: Optional[typing.Callable[[OutputBuffer], typing.Any]] = None,
+    ) -> None:
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self._lines: deque[str] = deque()
+        self._bytes = 0
+        self._dropped = 0  # lines gone for good, before the spill file and memory
+        self._spill = _SpillFile(max_spill_bytes) if spill else None
+        self._pending: list[str] = []
+        self._pending_chars = 0
+        self._partial = ""
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._flush_scheduled = False
+        self._closed = False
+
+    @property
+    def start(self) -> int:
+        """Absolute number of the oldest line still available."""
+        if self._spill is not None:
+            return self._dropped + self._spill.first
+        return self._dropped
+
+    @property
+    def end(self) -> int:
+        """Absolute number one past the newest line."""
+        spilled = len(self._spill) if self._spill is not None else 0
+        return self.start + spilled + len(self._lines)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, position: int) -> str:
+        if not self.start <= position < self.end:
+            raise IndexError(position)
+        offset = position - self.start
+        spilled = len(self._spill) if self._spill is not None else 0
+        if offset < spilled:
+            return self._spill[offset]
+        return self._lines[offset - spilled]
+
+    def write(self, text: str) -> None:
+        """Queue *text* (any number of lines); safe to call from any thread."""
+        in_ui = threading.current_thread() is threading.main_thread()
+        with self._lock:
+            # The UI thread can't wait for itself to flush, see below
+            while self._pending_chars >= self.max_pending and not in_ui and not self._closed:
+                self._drained.wait()
+            if self._closed:
+                return
+            self._pending.append(text)
+            self._pending_chars += len(text)
+            # ... so it flushes right away instead
+            flush_now = in_ui and self._pending_chars >= self.max_pending
+            if not flush_now:
+                if self._flush_scheduled:
+                    return
+                self._flush_scheduled = True
+        if flush_now:
+            self.flush()
+        else:
+            call_in_ui(self.flush)
+
+    def flush(self) -> int:
+        """Move queued text into the buffer and return the number of new lines."""
+        with self._lock:
+            text = self._partial + "".join(self._pending)
+            self._pending = []
+            self._pending_chars = 0
+            self._flush_scheduled = False
+            self._drained.notify_all()
+            if self._closed:
+                return 0
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        width = max(self.max_bytes - 1, 1)
+        if len(self._partial) > width:
+            # Cut a line that never ends so it can't grow past the size cap
+            cut = len(self._partial) - len(self._partial) % width
+            lines.extend(self._partial[i:i + width] for i in range(0, cut, width))
+            self._partial = self._partial[cut:]
+        if len(lines) > self.max_lines and self._spill is None:
+            # Only the tail can survive, skip the rest without storing it
+            self._dropped += len(lines) - self.max_lines
+            lines = lines[-self.max_lines:]
+        self._lines.extend(lines)
+        self._bytes += sum(len(line) + 1 for line in lines)
+        self._evict()
+        if lines and self.on_flush:
+            self.on_flush(self)
+        return len(lines)
+
+    def _evict(self) -> None:
+        evicted = []
+        while self._lines and (len(self._lines) > self.max_lines or self._bytes > self.max_bytes):
+            line = self._lines.popleft()
+            self._bytes -= len(line) + 1
+            evicted.append(line)
+        if not evicted:
+            return
+        if self._spill is not None:
+            self._spill.append(evicted)
+        else:
+            self._dropped += len(evicted)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._pending = []
+            self._pending_chars = 0
+            # Writers waiting for room give up instead of waiting for a flush
+            self._drained.notify_all()
+        if self._spill is not None:
+            self._spill.close()
+
+
+class OutputWalker(urwid.ListWalker):
+    """List walker over an :class:`OutputBuffer` that builds line widgets on demand.
+
+    Only the lines the ListBox asks for (the visible viewport) get a Text
+    widget, and a small cache keeps them from being rebuilt every frame.
+    """
+
+    cache_size = 256
+
+    def __init__(self, buffer: OutputBuffer) -> None:
+        super().__init__()
+        self.buffer = buffer
+        self.focus = buffer.start
+        self._widgets: dict[int, urwid.Text] = {}
+
+    def _widget(self, position: int) -> urwid.Text:
+        widget = self._widgets.get(position)
+        if widget is None:
+            if len(self._widgets) >= self.cache_size:
+                self._widgets.clear()
+            widget = self._widgets[position] = urwid.Text(self.buffer[position], wrap="any")
+        return widget
+
+    def _valid(self, position: int) -> bool:
+        return self.buffer.start <= position < self.buffer.end
+
+    def get_focus(self):
+        if not self._valid(self.focus):
+            if not len(self.buffer):
+                return None, None
+            self.focus = min(max(self.focus, self.buffer.start), self.buffer.end - 1)
+        return self._widget(self.focus), self.focus
+
+    def set_focus(self, position: int) -> None:
+        self.focus = position
+        self._modified()
+
+    def get_next(self, position: int):
+        return self._get(position + 1)
+
+    def get_prev(self, position: int):
+        return self._get(position - 1)
+
+    def _get(self, position: int):
+        if not self._valid(position):
+            return None, None
+        return self._widget(position), position
+
+    def following(self) -> bool:
+        """Whether the focus is on (or past) the newest line."""
+        return self.focus >= self.buffer.end - 1
+
+    def changed(self, was_following: bool) -> None:
+        """Tell the ListBox new lines arrived, keeping the view at the bottom if it was."""
+        if was_following and len(self.buffer):
+            self.focus = self.buffer.end - 1
+        self._modified()
+
+
+class OutputPane(urwid.WidgetWrap[urwid.ListBox]):
+    """Scrollable pane showing an :class:`OutputBuffer`, following new output at the bottom."""
+
+    def __init__(self, buffer: Optional[OutputBuffer] = None) -> None:
+        self.buffer = buffer if buffer is not None else OutputBuffer()
+        self.walker = OutputWalker(self.buffer)
+        self._following = True
+        self.buffer.on_flush = self._flushed
+        super().__init__(urwid.ListBox(self.walker))
+
+    def write(self, text: str) -> None:
+        self.buffer.write(text)
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    def _flushed(self, buffer: OutputBuffer) -> None:
+        self.walker.changed(self._following)
+
+    def keypress(self, size, key):
+        key = super().keypress(size, key)
+        self._following = self.walker.following()
+        return key
+
+    def mouse_event(self, size, event, button, col, row, focus):
+        handled = super().mouse_event(size, event, button, col, row, focus)
+        self._following = self.walker.following()
+        return handled
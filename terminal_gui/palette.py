@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import functools
+import os
+import re
+
+import toml
+
+# (attribute name, fg key, bg key, default fg, default bg)
+PALETTE_ENTRIES = [
+    (None, 'default_fg', 'default_bg', 'black', 'light gray'),
+    ("heading", 'heading_fg', 'heading_bg', 'black', 'light gray'),
+    ("line", 'line_fg', 'line_bg', 'black', 'light gray'),
+    ("options", 'options_fg', 'options_bg', 'black', 'light gray'),
+    ("focus heading", 'focus_heading_fg', 'focus_heading_bg', 'white', 'dark blue'),
+    ("focus line", 'focus_line_fg', 'focus_line_bg', 'white', 'dark blue'),
+    ("focus options", 'focus_options_fg', 'focus_options_bg', 'white', 'dark blue'),
+    ("selected", 'selected_fg', 'selected_bg', 'white', 'dark blue'),
+]
+
+# Basic terminal colors and their usual xterm RGB values
+BASIC_COLORS = {
+    'black': (0x00, 0x00, 0x00),
+    'dark red': (0x80, 0x00, 0x00),
+    'dark green': (0x00, 0x80, 0x00),
+    'brown': (0x80, 0x80, 0x00),
+    'dark blue': (0x00, 0x00, 0x80),
+    'dark magenta': (0x80, 0x00, 0x80),
+    'dark cyan': (0x00, 0x80, 0x80),
+    'light gray': (0xc0, 0xc0, 0xc0),
+    'dark gray': (0x80, 0x80, 0x80),
+    'light red': (0xff, 0x00, 0x00),
+    'light green': (0x00, 0xff, 0x00),
+    'yellow': (0xff, 0xff, 0x00),
+    'light blue': (0x00, 0x00, 0xff),
+    'light magenta': (0xff, 0x00, 0xff),
+    'light cyan': (0x00, 0xff, 0xff),
+    'white': (0xff, 0xff, 0xff),
+}
+
+ATTRIBUTE_SETTINGS = {'bold', 'underline', 'blink', 'standout', 'italics', 'strikethrough'}
+
+TRUE_COLOR = 2 ** 24
+COLOR_DEPTHS = (1, 16, 88, 256, TRUE_COLOR)
+
+_HEX_COLOR = re.compile(r'^#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+# urwid's own high color specs: h0-h255 (256 color index), g0-g100 and g#00-g#ff (grays)
+_HIGH_COLOR = re.compile(r'^(?:h(\d{1,3})|g(\d{1,3})|g#([0-9a-fA-F]{2}))$')
+
+_CUBE_256 = (0x00, 0x5f, 0x87, 0xaf, 0xd7, 0xff)
+_GRAYS_256 = tuple(8 + 10 * i for i in range(24))
+_CUBE_88 = (0x00, 0x8b, 0xcd, 0xff)
+_GRAYS_88 = (0x2e, 0x5c, 0x73, 0x8b, 0xa2, 0xb9, 0xd0, 0xe7)
+
+
+@functools.lru_cache(maxsize=None)
+def detect_color_depth() -> int:
+    """Return the number of colors the terminal supports, detected once per process."""
+    colorterm = os.environ.get('COLORTERM', '').lower()
+    if colorterm in ('truecolor', '24bit'):
+        return TRUE_COLOR
+    term = os.environ.get('TERM', '').lower()
+    if 'truecolor' in term or 'direct' in term:
+        return TRUE_COLOR
+    if '256color' in term:
+        return 256
+    if '88color' in term:
+        return 88
+    if term == 'dumb':
+        return 1
+    return 16
+
+
+def parse_hex(value: str) -> tuple[int, int, int]:
+    """Parse ``#rgb`` or ``#rrggbb`` into an RGB triple."""
+    match = _HEX_COLOR.match(value)
+    if not match:
+        raise ValueError(f"Invalid hex color: {value!r}")
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = ''.join(c * 2 for c in digits)
+    return int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16)
+
+
+def high_color_rgb(value: str) -> tuple[int, int, int]:
+    """Return the RGB value of an urwid ``hN``, ``gN`` or ``g#hh`` color spec."""
+    match = _HIGH_COLOR.match(value)
+    if not match:
+        raise ValueError(f"Invalid high color: {value!r}")
+    index, percent, gray_hex = match.groups()
+    if index is not None:
+        index = int(index)
+        if index > 255:
+            raise ValueError(f"High color index out of range 0-255: {value!r}")
+        if index < 16:
+            return list(BASIC_COLORS.values())[index]
+        if index >= 232:
+            return (_GRAYS_256[index - 232],) * 3
+        index -= 16
+        return _CUBE_256[index // 36], _CUBE_256[index // 6 % 6], _CUBE_256[index % 6]
+    if percent is not None:
+        if int(percent) > 100:
+            raise ValueError(f"Gray level out of range 0-100: {value!r}")
+        return (round(int(percent) * 255 / 100),) * 3
+    return (int(gray_hex, 16),) * 3
+
+
+def _distance(a: tuple[int, int, int], b: tuple[int, int, int]) -> int:
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+def _nearest_level(value: int, levels: tuple[int, ...]) -> int:
+    return min(range(len(levels)), key=lambda i: abs(levels[i] - value))
+
+
+def _nearest_indexed(rgb: tuple[int, int, int], cube: tuple[int, ...], grays: tuple[int, ...]) -> int:
+    size = len(cube)
+    r, g, b = (_nearest_level(c, cube) for c in rgb)
+    cube_index = 16 + r * size * size + g * size + b
+    cube_rgb = (cube[r], cube[g], cube[b])
+    gray = _nearest_level(sum(rgb) // 3, grays)
+    gray_index = 16 + size ** 3 + gray
+    if _distance(rgb, (grays[gray],) * 3) < _distance(rgb, cube_rgb):
+        return gray_index
+    return cube_index
+
+
+@functools.lru_cache(maxsize=1024)
+def nearest_color(value: str, depth: int) -> str:
+    """Map a ``#rrggbb`` color to the closest urwid color spec for *depth* colors."""
+    rgb = parse_hex(value)
+    if depth >= TRUE_COLOR:
+        return '#%02x%02x%02x' % rgb
+    if depth >= 256:
+        return 'h%d' % _nearest_indexed(rgb, _CUBE_256, _GRAYS_256)
+    if depth >= 88:
+        return 'h%d' % _nearest_indexed(rgb, _CUBE_88, _GRAYS_88)
+    return min(BASIC_COLORS, key=lambda name: _distance(rgb, BASIC_COLORS[name]))
+
+
+def validate_color(value, background: bool = False) -> None:
+    """Raise ``ValueError`` if *value* is not a color urwid understands.
+
+    Attributes such as ``bold`` only apply to foreground colors.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"Color must be a string, got {value!r}")
+    color, *settings = [part.strip() for part in value.split(',')]
+    if background and settings:
+        raise ValueError(f"Background colors take no attributes, got {value!r}")
+    for setting in settings:
+        if setting not in ATTRIBUTE_SETTINGS:
+            raise ValueError(f"Unknown color attribute {setting!r} in {value!r}")
+    if color in ('', 'default') or color in BASIC_COLORS:
+        return
+    if color.startswith('#'):
+        parse_hex(color)
+        return
+    if _HIGH_COLOR.match(color):
+        high_color_rgb(color)
+        return
+    raise ValueError(f"Unknown color: {value!r}")
+
+
+def validate_colors(colors) -> None:
+    """Check every palette color in *colors*, reporting all bad keys at once."""
+    errors = []
+    for _, fg_key, bg_key, _, _ in PALETTE_ENTRIES:
+        for key, background in ((fg_key, False), (bg_key, True)):
+            if key in colors:
+                try:
+                    validate_color(colors[key], background)
+                except ValueError as e:
+                    errors.append(f"menu_colors.{key}: {e}")
+    if errors:
+        raise ValueError("Invalid menu colors:\n  " + "\n  ".join(errors))
+
+
+def _compile_color(value: str, depth: int) -> tuple[str, str]:
+    """Return the (16 color, high color) specs for a configured color."""
+    color, *settings = [part.strip() for part in value.split(',')]
+    suffix = ''.join(',' + setting for setting in settings)
+    if color.startswith('#'):
+        basic = nearest_color(color, 16)
+        high = nearest_color(color, depth) if depth > 16 else basic
+    elif _HIGH_COLOR.match(color):
+        # Only terminals with 256 colors or more take any urwid high color spec as is
+        rgb = '#%02x%02x%02x' % high_color_rgb(color)
+        basic = nearest_color(rgb, 16)
+        high = color if depth >= 256 else nearest_color(rgb, depth) if depth > 16 else basic
+    else:
+        basic = high = color
+    return basic + suffix, high + suffix
+
+
+def compile_palette(colors, depth: int | None = None):
+    """Build an urwid palette from *colors*, mapping hex values to *depth* colors."""
+    validate_colors(colors)
+    depth = depth or detect_color_depth()
+    if depth not in COLOR_DEPTHS:
+        raise ValueError(f"Unsupported color depth: {depth}")
+    palette = []
+    for name, fg_key, bg_key, fg_default, bg_default in PALETTE_ENTRIES:
+        fg, fg_high = _compile_color(colors.get(fg_key, fg_default), depth)
+        bg, bg_high = _compile_color(colors.get(bg_key, bg_default), depth)
+        if depth > 16:
+            palette.append((name, fg, bg, None, fg_high, bg_high))
+        else:
+            palette.append((name, fg, bg))
+    return palette
+
+
+def load_theme(path):
+    """Load the ``menu_colors`` table from a theme file."""
+    with open(path, 'r') as file:
+        theme = toml.load(file)
+    return theme.get('menu_colors', theme)
+
+
+def resolve_menu_colors(config, base_dir='.'):
+    """Merge the config's ``theme`` file (if any) with its own ``menu_colors``."""
+    colors = {}
+    theme = config.get('theme')
+    if theme:
+        colors.update(load_theme(os.path.join(base_dir, theme)))
+    colors.update(config.get('menu_colors', {}))
+    validate_colors(colors)
+    return colors
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+import typing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .command_executor import OUTPUT_OPTIONS, CommandExecutor, command_args
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import Optional
+
+STEP_TYPES = ("shell", "python", "program")
+DEFAULT_MAX_WORKERS = 4
+# Every key a pipeline command table may have
+PIPELINE_KEYS = ('type', 'value', 'working_dir', 'max_workers') + OUTPUT_OPTIONS
+
+PENDING = "pending"
+RUNNING = "running"
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+def pipeline_problems(command) -> list[tuple[str, str]]:
+    """Return (key, message) pairs for everything wrong with a pipeline command."""
+    steps = command.get('value')
+    if not isinstance(steps, list) or not steps:
+        return [('value', "must be a non-empty array of step tables")]
+    problems = []
+    max_workers = command.get('max_workers')
+    if max_workers is not None and (not isinstance(max_workers, int) or max_workers < 1):
+        problems.append(('max_workers', "must be a positive integer"))
+    for key in command:
+        if key not in PIPELINE_KEYS:
+            problems.append((key, f"unknown key for a pipeline command (expected one of: {', '.join(PIPELINE_KEYS)})"))
+
+    names = set()
+    for index, step in enumerate(steps):
+        path = f"value[{index}]"
+        if not isinstance(step, dict):
+            problems.append((path, "must be a table"))
+            continue
+        name = step.get('name')
+        if not isinstance(name, str) or not name:
+            problems.append((f"{path}.name", "must be a non-empty string"))
+        elif name in names:
+            problems.append((f"{path}.name", f"duplicate step name {name!r}"))
+        names.add(name)
+        if step.get('type') not in STEP_TYPES:
+            problems.append((f"{path}.type", f"unknown step type {step.get('type')!r} (expected one of: "
+                                             f"{', '.join(STEP_TYPES)})"))
+        if not isinstance(step.get('value'), str) or not step['value'].strip():
+            problems.append((f"{path}.value", "must be a non-empty string"))
+        needs = step.get('needs', [])
+        if not isinstance(needs, list) or not all(isinstance(need, str) for need in needs):
+            problems.append((f"{path}.needs", "must be an array of step names"))
+    if problems:
+        return problems
+
+    for index, step in enumerate(steps):
+        for need in step.get('needs', []):
+            if need not in names:
+                problems.append((f"value[{index}].needs", f"unknown step {need!r}"))
+    if not problems and _topological_order(steps) is None:
+        problems.append(('value', "steps have a dependency cycle"))
+    return problems
+
+
+def _topological_order(steps) -> list[str] | None:
+    """Return step names in dependency order, or ``None`` if there is a cycle."""
+    waiting = {step['name']: len(step.get('needs', [])) for step in steps}
+    dependents: dict[str, list[str]] = {step['name']: [] for step in steps}
+    for step in steps:
+        for need in step.get('needs', []):
+            dependents[need].append(step['name'])
+    ready = [name for name, count in waiting.items() if count == 0]
+    order = []
+    while ready:
+        name = ready.pop()
+        order.append(name)
+        for dependent in dependents[name]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                ready.append(dependent)
+    return order if len(order) == len(steps) else None
+
+
+class Pipeline:
+    """Run a DAG of command steps on a bounded thread pool.
+
+    Each step is a table with ``name``, ``type``, ``value`` and optional
+    ``needs`` (names of steps that must succeed first) and ``working_dir``.
+    Steps whose dependencies have all succeeded run in parallel, up to
+    *max_workers* at a time. When a step fails, every step downstream of it
+    is skipped while independent branches keep running. *on_progress* is
+    called with ``(step name, message)`` from worker threads as steps change
+    state.
+    """
+
+    def __init__(
+        self,
+        steps: list[dict],
+        working_dir: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        on_progress: Optional[Callable[[str, str], typing.Any]] = None,
+    ) -> None:
+        self.steps = {step['name']: step for step in steps}
+        self.working_dir = working_dir
+        self.max_workers = max_workers
+        self.on_progress = on_progress
+        self.status = {name: PENDING for name in self.steps}
+        self._dependents: dict[str, list[str]] = {name: [] for name in self.steps}
+        for step in steps:
+            for need in step.get('needs', []):
+                self._dependents[need].append(step['name'])
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> Pipeline:
+        """Run the pipeline in a background thread."""
+        self._thread = threading.Thread(target=self.run, name="pipeline", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float | None = None) -> dict[str, str]:
+        if self._thread:
+            self._thread.join(timeout)
+        return self.status
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def succeeded(self) -> bool:
+        return all(status == OK for status in self.status.values())
+
+    def run(self) -> dict[str, str]:
+        """Run every step and return the final status of each."""
+        for name in self.steps:
+            self._report(name, PENDING)
+        waiting = {name: set(step.get('needs', [])) for name, step in self.steps.items()}
+        ready = [name for name, needs in waiting.items() if not needs]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline-step") as pool:
+            running = {}
+            while ready or running:
+                for name in ready:
+                    self.status[name] = RUNNING
+                    self._report(name, RUNNING)
+                    running[pool.submit(self._run_step, self.steps[name])] = name
+                ready = []
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    ok, detail = future.result()
+                    self.status[name] = OK if ok else FAILED
+                    self._report(name, detail)
+                    if not ok:
+                        self._skip_downstream(name)
+                        continue
+                    for dependent in self._dependents[name]:
+                        waiting[dependent].discard(name)
+                        if not waiting[dependent] and self.status[dependent] == PENDING:
+                            ready.append(dependent)
+        return self.status
+
+    def _run_step(self, step: dict) -> tuple[bool, str]:
+        args, shell = command_args(step['type'], step['value'])
+        start = time.monotonic()
+        try:
+            with CommandExecutor.waiting_child():
+                result = subprocess.run(
+                    args,
+                    shell=shell,
+                    cwd=step.get('working_dir') or self.working_dir,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                )
+        except OSError as e:
+            return False, f"{FAILED}: {e}"
+        elapsed = time.monotonic() - start
+        if result.returncode == 0:
+            return True, f"{OK} ({elapsed:.1f}s)"
+        last_line = result.stdout.strip().splitlines()[-1:] if result.stdout else []
+        detail = f"{FAILED} (exit {result.returncode}, {elapsed:.1f}s)"
+        return False, f"{detail}: {last_line[0]}" if last_line else detail
+
+    def _skip_downstream(self, name: str) -> None:
+        pending = list(self._dependents[name])
+        while pending:
+            dependent = pending.pop()
+            if self.status[dependent] == PENDING:
+                self.status[dependent] = SKIPPED
+                self._report(dependent, f"{SKIPPED} ({name} failed)")
+                pending.extend(self._dependents[dependent])
+
+    def _report(self, name: str, message: str) -> None:
+        if self.on_progress:
+            self.on_progress(name, message)
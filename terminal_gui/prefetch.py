@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import time
+import typing
+
+import urwid
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from .menu_components import LazyMenu
+
+DEFAULT_BUDGET_MS = 4
+DEFAULT_MAX_SIBLINGS = 3
+
+
+def _lazy_menu(widget: urwid.Widget) -> LazyMenu | None:
+    lazy = getattr(widget, 'lazy_menu', None)
+    if lazy is None:
+        lazy = getattr(getattr(widget, 'base_widget', None), 'lazy_menu', None)
+    return lazy
+
+
+def _focused_listbox(widget: urwid.Widget) -> urwid.ListBox | None:
+    """Follow the focus down from *widget* and return the innermost ListBox on the way."""
+    listbox = None
+    while widget is not None:
+        if isinstance(widget, urwid.ListBox):
+            listbox = widget
+        if hasattr(widget, 'original_widget'):
+            widget = widget.original_widget
+        elif isinstance(widget, (urwid.ListBox, urwid.Overlay, urwid.Columns, urwid.Pile)):
+            widget = widget.focus
+        else:
+            break
+    return listbox
+
+
+class Prefetcher:
+    """Build submenus the user is likely to open next while the menu is idle.
+
+    After every redraw the submenu of the focused item and those of up to
+    *max_siblings* items on each side of it (nearest first) are queued, and
+    one slice of at most *budget_ms* of building runs from an alarm. Input
+    is handled before alarms, so a keypress waits for at most one slice.
+    """
+
+    def __init__(
+        self,
+        budget_ms: float = DEFAULT_BUDGET_MS,
+        max_siblings: int = DEFAULT_MAX_SIBLINGS,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        if budget_ms <= 0:
+            raise ValueError(f"budget_ms must be positive, got {budget_ms}")
+        self.budget = budget_ms / 1000
+        self.max_siblings = max_siblings
+        self.clock = clock
+        self.queue: list[LazyMenu] = []
+        self.built = 0
+        self._alarm = None
+
+    def targets(self, widget: urwid.Widget) -> list[LazyMenu]:
+        """Return the unbuilt submenus around the focus of *widget*, most likely first."""
+        listbox = _focused_listbox(widget)
+        if listbox is None or not isinstance(listbox.body, list):
+            return []
+        body = listbox.body
+        position = listbox.focus_position
+        candidates = [position]
+        for distance in range(1, self.max_siblings + 1):
+            candidates.extend((position + distance, position - distance))
+        menus = []
+        for index in candidates:
+            if 0 <= index < len(body):
+                lazy = _lazy_menu(body[index])
+                if lazy is not None and not lazy.done:
+                    menus.append(lazy)
+        return menus
+
+    def step(self) -> bool:
+        """Build queued submenus for one time slice; return whether any are left."""
+        deadline = self.clock() + self.budget
+        while self.queue:
+            if not self.queue[0].step(deadline, self.clock):
+                return True
+            self.queue.pop(0)
+            self.built += 1
+            if self.clock() >= deadline:
+                break
+        return bool(self.queue)
+
+    def attach(self, loop: urwid.MainLoop) -> None:
+        """Prefetch around the focus of *loop*'s widget whenever it goes idle."""
+        def idle() -> None:
+            self.queue = self.targets(loop.widget)
+            if self.queue and self._alarm is None:
+                self._alarm = loop.set_alarm_in(0, run)
+
+        def run(loop: urwid.MainLoop, user_data=None) -> None:
+            # One slice per idle pass, so redraws and input are never starved
+            self._alarm = None
+            self.step()
+
+        loop.event_loop.enter_idle(idle)
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import typing
+
+import urwid
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+def _encode_key(key):
+    # Mouse events are tuples, which JSON turns into lists
+    return list(key) if isinstance(key, tuple) else key
+
+
+def _decode_key(key):
+    return tuple(key) if isinstance(key, list) else key
+
+
+class SessionRecorder:
+    """Record input batches and frame render times of an ``urwid.MainLoop``.
+
+    The recording is a JSON lines file: a header with the config, menu type
+    and screen size, then one line per input batch with its timestamp, the
+    keys, the time spent handling them, the duration of the frame that
+    followed and the input-to-frame latency (all times in milliseconds).
+    """
+
+    def __init__(self, path: str, config_file: str, menu_type: str) -> None:
+        self.path = path
+        self.config_file = config_file
+        self.menu_type = menu_type
+        self.file = None
+        self.started = None
+        self._pending = None
+        self._pending_start = None
+
+    def __enter__(self) -> SessionRecorder:
+        self.file = open(self.path, 'w')
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def attach(self, loop: urwid.MainLoop) -> None:
+        """Wrap *loop*'s input processing and drawing to record them."""
+        process_input = loop.process_input
+        draw_screen = loop.draw_screen
+
+        def recording_process_input(keys):
+            if self.started is None:
+                self._write_header(loop)
+            start = time.perf_counter()
+            try:
+                return process_input(keys)
+            finally:
+                self._input_done(start, keys, loop)
+
+        def recording_draw_screen():
+            start = time.perf_counter()
+            draw_screen()
+            self._frame_done(start)
+
+        loop.process_input = recording_process_input
+        loop.draw_screen = recording_draw_screen
+
+    def _write_header(self, loop: urwid.MainLoop) -> None:
+        self.started = time.perf_counter()
+        size = loop.screen_size or loop.screen.get_cols_rows()
+        self._write({
+            'config': self.config_file,
+            'menu_type': self.menu_type,
+            'size': list(size),
+            'recorded_at': time.time(),
+        })
+
+    def _input_done(self, start: float, keys: Iterable, loop: urwid.MainLoop) -> None:
+        keys = [_encode_key(key) for key in keys]
+        event = {
+            't': round((start - self.started) * 1000, 3),
+            'keys': keys,
+            'input_ms': round((time.perf_counter() - start) * 1000, 3),
+        }
+        if 'window resize' in keys:
+            event['size'] = list(loop.screen.get_cols_rows())
+        if self._pending is not None:
+            # Several input batches can be handled before one frame is drawn
+            self._pending['keys'].extend(keys)
+            self._pending['input_ms'] += event['input_ms']
+            if 'size' in event:
+                self._pending['size'] = event['size']
+        else:
+            self._pending = event
+            self._pending_start = start
+
+    def _frame_done(self, start: float) -> None:
+        if self._pending is None:
+            return
+        end = time.perf_counter()
+        event = self._pending
+        event['frame_ms'] = round((end - start) * 1000, 3)
+        event['latency_ms'] = round((end - self._pending_start) * 1000, 3)
+        self._pending = None
+        self._write(event)
+
+    def _write(self, record: dict) -> None:
+        if self.file:
+            self.file.write(json.dumps(record) + '\n')
+            self.file.flush()
+
+
+def load_recording(path: str) -> tuple[dict, list[dict]]:
+    """Return the header and input events of a recording."""
+    with open(path, 'r') as file:
+        lines = [json.loads(line) for line in file if line.strip()]
+    if not lines:
+        raise ValueError(f"Empty recording: {path}")
+    header, events = lines[0], lines[1:]
+    for event in events:
+        event['keys'] = [_decode_key(key) for key in event['keys']]
+    return header, events
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of *values*."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(latencies: dict[str, list[float]]) -> dict[str, dict[str, float]]:
+    """Return count, p50, p90, p99 and max latency for each key and overall."""
+    def stats(values):
+        return {
+            'count': len(values),
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p99': percentile(values, 99),
+            'max': max(values) if values else 0.0,
+        }
+
+    everything = [value for values in latencies.values() for value in values]
+    summary = {'all': stats(everything)}
+    for key in sorted(latencies):
+        summary[key] = stats(latencies[key])
+    return summary
+
+
+def _key_name(key) -> str:
+    return key if isinstance(key, str) else key[0]
+
+
+def replay(recording_path: str, config_file: str | None = None, execute_commands: bool = False):
+    """Feed a recording to a headless ``Menu`` and time each input to its frame.
+
+    Returns :func:`summarize` output in milliseconds. Commands are checked
+    but not started unless *execute_commands* is set.
+    """
+    from .command_executor import CommandExecutor  # Keep local import to avoid circular import
+    from .menu import Menu
+
+    header, events = load_recording(recording_path)
+    menu = Menu(config_file or header['config'])
+    widget = menu.create_top_widget()
+    size = tuple(header['size'])
+    latencies: dict[str, list[float]] = {}
+
+    dry_run = CommandExecutor.dry_run
+    CommandExecutor.dry_run = not execute_commands
+    try:
+        for event in events:
+            if event.get('size'):
+                size = tuple(event['size'])
+            start = time.perf_counter()
+            try:
+                _feed(widget, menu, size, event['keys'])
+            except urwid.ExitMainLoop:
+                break
+            canvas = widget.render(size, focus=True)
+            # Materialize the canvas like a real screen would
+            for _ in canvas.content():
+                pass
+            elapsed = (time.perf_counter() - start) * 1000
+            for key in event['keys']:
+                if key != 'window resize':
+                    latencies.setdefault(_key_name(key), []).append(elapsed)
+    finally:
+        CommandExecutor.dry_run = dry_run
+    return summarize(latencies)
+
+
+def _feed(widget, menu, size, keys) -> None:
+    for key in keys:
+        if key == 'window resize':
+            continue
+        if isinstance(key, tuple):
+            widget.mouse_event(size, *key, focus=True)
+            continue
+        if widget.selectable():
+            key = widget.keypress(size, key)
+        if key:
+            menu.keypress(key)
+
+
+def format_summary(summary: dict[str, dict[str, float]]) -> str:
+    lines = [f"{'key':<16}{'count':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"]
+    for key, stats in summary.items():
+        lines.append(
+            f"{key:<16}{stats['count']:>7}{stats['p50']:>9.2f}{stats['p90']:>9.2f}"
+            f"{stats['p99']:>9.2f}{stats['max']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m terminal_gui.recording',
+        description='Replay a recorded session headlessly and report input-to-frame latency (ms).',
+    )
+    parser.add_argument('recording', help='file written by terminal-gui --record')
+    parser.add_argument('--config', help='menu config to replay against (default: the recorded one)')
+    parser.add_argument('--max-p99', type=float, help='exit with status 1 if the overall p99 exceeds this')
+    args = parser.parse_args(argv)
+
+    summary = replay(args.recording, args.config)
+    print(format_summary(summary))
+    if args.max_p99 is not None and summary['all']['p99'] > args.max_p99:
+        print(f"p99 {summary['all']['p99']:.2f} ms exceeds {args.max_p99:.2f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import math
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .command_executor import CommandExecutor
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Sequence
+    from typing import Optional
+
+DEFAULT_PERSIST = 600
+DEFAULT_MAX_FANOUT = 16
+DEFAULT_CONNECT_TIMEOUT = 10
+# Time the master may take on top of the TCP connect (key exchange, authentication)
+HANDSHAKE_GRACE = 10
+# Every key a remote command table may have
+REMOTE_KEYS = ('type', 'value', 'working_dir', 'hosts', 'timeout')
+
+
+def remote_problems(command) -> list[tuple[str, str]]:
+    """Return (key, message) pairs for everything wrong with a remote command."""
+    problems = []
+    value = command.get('value')
+    if not isinstance(value, str) or not value.strip():
+        problems.append(('value', "must be a non-empty string"))
+    hosts = command.get('hosts')
+    if isinstance(hosts, str):
+        hosts = [hosts]
+    if not isinstance(hosts, list) or not hosts or not all(isinstance(h, str) and h for h in hosts):
+        problems.append(('hosts', "must be a host name or a non-empty array of host names"))
+    timeout = command.get('timeout')
+    if timeout is not None and (not isinstance(timeout, (int, float)) or timeout <= 0):
+        problems.append(('timeout', "must be a positive number of seconds"))
+    for key in command:
+        if key not in REMOTE_KEYS:
+            problems.append((key, f"unknown key for a remote command (expected one of: {', '.join(REMOTE_KEYS)})"))
+    return problems
+
+
+def _last_line(output: str) -> str:
+    lines = output.strip().splitlines()
+    return lines[-1] if lines else ""
+
+
+class SSHConnectionPool:
+    """Reusable SSH connections, one OpenSSH ControlMaster per host.
+
+    The first command for a host starts a master connection in the
+    background (one handshake); later commands to that host are multiplexed
+    over it until *persist* seconds of inactivity. A host that doesn't
+    answer within *connect_timeout* seconds fails instead of blocking every
+    command waiting for it. *ssh_command* can be replaced with a stand-in
+    runner that accepts the same arguments.
+    """
+
+    def __init__(
+        self,
+        ssh_command: Sequence[str] = ("ssh",),
+        persist: int = DEFAULT_PERSIST,
+        max_fanout: int = DEFAULT_MAX_FANOUT,
+        control_dir: Optional[str] = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    ) -> None:
+        self.ssh_command = list(ssh_command)
+        self.persist = persist
+        self.connect_timeout = connect_timeout
+        self.max_fanout = max_fanout
+        self._own_control_dir = control_dir is None
+        self.control_dir = control_dir or tempfile.mkdtemp(prefix="terminal-gui-ssh-")
+        self._masters: set[str] = set()
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def control_path(self, host: str) -> str:
+        # Hashed so the socket path stays under the unix socket length limit
+        return os.path.join(self.control_dir, hashlib.sha1(host.encode()).hexdigest()[:16])
+
+    def _ssh(self, host: str, *args: str, master: bool = False) -> list[str]:
+        if master:
+            control = ["-o", "ControlMaster=auto", "-o", f"ControlPersist={self.persist}"]
+        else:
+            # A command run that became a master (its master having died) would stay
+            # in the background holding our output pipe open for *persist* seconds
+            control = ["-o", "ControlMaster=no"]
+        return [
+            *self.ssh_command,
+            "-o", f"ControlPath={self.control_path(host)}",
+            *control,
+            "-o", "BatchMode=yes",
+            "-o", f"ConnectTimeout={math.ceil(self.connect_timeout)}",
+            *args,
+            host,
+        ]
+
+    def _lock(self, host: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(host, threading.Lock())
+
+    def ensure_master(self, host: str) -> None:
+        """Open the master connection to *host* unless one is already up."""
+        with self._lock(host):
+            if host in self._masters and os.path.exists(self.control_path(host)):
+                return
+            # The master detaches once connected, so it must not hold our pipes open
+            try:
+                with CommandExecutor.waiting_child():
+                    result = subprocess.run(
+                        self._ssh(host, "-N", "-f", master=True),
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                        timeout=self.connect_timeout + HANDSHAKE_GRACE,
+                    )
+            except subprocess.TimeoutExpired:
+                raise ConnectionError(f"Timed out connecting to {host}") from None
+            if result.returncode != 0:
+                raise ConnectionError(f"Could not connect to {host} (ssh exit {result.returncode})")
+            self._masters.add(host)
+
+    def run(self, host: str, command: str, working_dir: Optional[str] = None,
+            timeout: Optional[float] = None) -> tuple[int, str]:
+        """Run *command* on *host* and return its exit status and output."""
+        self.ensure_master(host)
+        if working_dir:
+            command = f"cd {shlex.quote(working_dir)} && {command}"
+        with CommandExecutor.waiting_child():
+            result = subprocess.run(
+                self._ssh(host) + [command],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                timeout=timeout,
+            )
+        return result.returncode, result.stdout
+
+    def fan_out(
+        self,
+        hosts: Iterable[str],
+        command: str,
+        working_dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[str, str], typing.Any]] = None,
+    ) -> dict[str, tuple[int, str]]:
+        """Run *command* on every host at once, at most *max_fanout* in parallel.
+
+        Returns ``{host: (exit status, output)}``; connection failures and
+        timeouts are reported with status 255.
+        """
+        hosts = list(dict.fromkeys(hosts))
+        report = on_progress or (lambda host, message: None)
+
+        def run_one(host):
+            report(host, "running")
+            try:
+                status, output = self.run(host, command, working_dir, timeout)
+            except (ConnectionError, OSError, subprocess.TimeoutExpired) as e:
+                status, output = 255, str(e)
+            state = "ok" if status == 0 else f"failed (exit {status})"
+            line = _last_line(output)
+            report(host, f"{state}: {line}" if line else state)
+            return status, output
+
+        for host in hosts:
+            report(host, "pending")
+        with ThreadPoolExecutor(max_workers=min(self.max_fanout, len(hosts)) or 1,
+                                thread_name_prefix="remote") as pool:
+            results = list(pool.map(run_one, hosts))
+        return dict(zip(hosts, results))
+
+    def start(self, hosts: Iterable[str], command: str, **options) -> Future:
+        """Run :meth:`fan_out` in the background and return a future for its result.
+
+        An error that stops the whole fan out is also reported to
+        *on_progress* as ``('error', message)``, as nobody may read the future.
+        """
+        future: Future = Future()
+
+        def run():
+            try:
+                future.set_result(self.fan_out(hosts, command, **options))
+            except BaseException as e:
+                on_progress = options.get('on_progress')
+                if on_progress is not None:
+                    on_progress("error", f"{type(e).__name__}: {e}")
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="remote", daemon=True).start()
+        return future
+
+    def close(self) -> None:
+        """Shut down every master connection."""
+        for host in list(self._masters):
+            subprocess.run(
+                [*self.ssh_command, "-o", f"ControlPath={self.control_path(host)}", "-O", "exit", host],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        self._masters.clear()
+        if self._own_control_dir:
+            shutil.rmtree(self.control_dir, ignore_errors=True)
+
+
+_default_pool: Optional[SSHConnectionPool] = None
+
+
+def default_pool() -> SSHConnectionPool:
+    """Return the process wide connection pool, closed at exit."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = SSHConnectionPool()
+        atexit.register(_default_pool.close)
+    return _default_pool
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+from collections import deque
+
+from .callables import callable_problems
+from .command_executor import CommandExecutor
+from .palette import COLOR_DEPTHS
+from .pipeline import pipeline_problems
+from .remote import remote_problems
+
+
+class ConfigError(ValueError):
+    """Raised with every problem found in a menu configuration."""
+
+    def __init__(self, errors: list[tuple[str, str]]) -> None:
+        self.errors = errors
+        lines = "\n  ".join(f"{path}: {message}" for path, message in errors)
+        super().__init__(f"Invalid menu configuration:\n  {lines}")
+
+
+def _is_text(value) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+def _validate_simple_command(command) -> list[tuple[str, str]]:
+    problems = []
+    if not _is_text(command.get('value')):
+        problems.append(('value', "must be a non-empty string"))
+    for key in ('stream', 'scrollback'):
+        if key in command and not isinstance(command[key], bool):
+            problems.append((key, "must be true or false"))
+    for key in ('max_lines', 'max_bytes'):
+        if key in command and (not isinstance(command[key], int) or command[key] < 1):
+            problems.append((key, "must be a positive integer"))
+    return problems
+
+
+# Per command type validators; each returns (key, message) pairs for a command table
+COMMAND_VALIDATORS = {
+    "shell": _validate_simple_command,
+    "python": _validate_simple_command,
+    "program": _validate_simple_command,
+    "pipeline": pipeline_problems,
+    "remote": remote_problems,
+    "callable": callable_problems,
+}
+
+
+def _command_problems(command) -> list[tuple[str, str]]:
+    if not isinstance(command, dict):
+        return [('', "must be a table")]
+    command_type = command.get('type')
+    if command_type not in COMMAND_VALIDATORS or command_type not in CommandExecutor.COMMAND_TYPES:
+        known = ", ".join(CommandExecutor.COMMAND_TYPES)
+        return [('type', f"unknown command type {command_type!r} (expected one of: {known})")]
+    problems = COMMAND_VALIDATORS[command_type](command)
+    working_dir = command.get('working_dir')
+    if working_dir is not None and not _is_text(working_dir):
+        problems.append(('working_dir', "must be a non-empty string"))
+    return problems
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Top-level settings: key -> (check, message)
+SETTINGS = {
+    'max_fps': (lambda value: _is_number(value) and value > 0, "must be a positive number"),
+    'max_repeat': (lambda value: isinstance(value, int) and not isinstance(value, bool) and value >= 1,
+                   "must be a positive integer"),
+    'prefetch_budget_ms': (lambda value: _is_number(value) and value >= 0,
+                           "must be a number of milliseconds (0 disables prefetching)"),
+    'hud_key': (_is_text, "must be a key name such as \"f2\""),
+    'metrics_interval': (lambda value: _is_number(value) and value > 0, "must be a positive number of seconds"),
+    'metrics_file': (_is_text, "must be a non-empty string"),
+    'metrics_socket': (_is_text, "must be a non-empty string"),
+    'color_depth': (lambda value: value in COLOR_DEPTHS and not isinstance(value, bool),
+                    f"must be one of {', '.join(map(str, COLOR_DEPTHS))}"),
+}
+
+
+def settings_problems(config: dict) -> list[tuple[str, str]]:
+    """Return (path, message) pairs for the top-level settings of *config* that are invalid."""
+    return [(key, message) for key, (check, message) in SETTINGS.items()
+            if key in config and not check(config[key])]
+
+
+def _freeze(value):
+    """Return a hashable equivalent of a TOML value."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _intern(entry: dict, interned: dict) -> dict:
+    """Return the first entry equal to *entry* seen in this validation, or *entry* itself.
+
+    Entries are keyed by name and command value, which are cheap to hash
+    and already tell almost all items apart. Only items that share both
+    are compared in full, and only those that still differ get a full key.
+    """
+    command = entry.get('command')
+    value = command.get('value') if isinstance(command, dict) else command
+    try:
+        key = (entry['name'], value)
+        first = interned.setdefault(key, entry)
+    except TypeError:
+        # Pipelines (a list of steps) and malformed values
+        key = (_freeze(entry['name']), _freeze(value))
+        first = interned.setdefault(key, entry)
+    if first is entry or first == entry:
+        return first
+    return interned.setdefault(_freeze(entry), entry)
+
+
+def _apply_template(item: dict, templates: dict) -> dict:
+    """Return *item* merged over the template it names; command tables merge key by key."""
+    template = templates[item['template']]
+    merged = {**template, **item}
+    del merged['template']
+    if isinstance(template.get('command'), dict) and isinstance(item.get('command'), dict):
+        merged['command'] = {**template['command'], **item['command']}
+    return merged
+
+
+def _template_errors(templates, path: str) -> list[tuple[str, str]]:
+    if not isinstance(templates, dict):
+        return [(path, "must be a table")]
+    errors = []
+    for name, template in templates.items():
+        if not isinstance(template, dict):
+            errors.append((f"{path}.{name}", "must be a table"))
+        elif 'template' in template:
+            errors.append((f"{path}.{name}.template", "templates cannot use other templates"))
+    return errors
+
+
+def validate_menu_structure(structure, path: str = "menu_structure", templates=None, memo=None) -> dict:
+    """Validate *structure* in one pass and return its normalized form.
+
+    Every item in the result has a ``name`` and at most one of ``submenu``
+    (a list of items) or ``command`` (a table with ``type``, ``value`` and
+    ``working_dir``). An item with ``template = "x"`` starts from
+    ``templates["x"]`` and overrides its keys. All errors are collected and
+    raised together as a :class:`ConfigError`, each tagged with its TOML path.
+
+    Identical leaf items are interned: they come back as one shared dict,
+    so the menu builders can compile each distinct item once. The result
+    must be treated as read-only.
+
+    *memo* (a dict owned by the caller) carries normalized items from one
+    validation to the next. An item that is the very same object as last
+    time, as the items of unchanged fragments are, is reused with its whole
+    subtree instead of being checked again. The memo only applies to the
+    same *templates*, and it is only updated when validation succeeds.
+    """
+    if not isinstance(structure, dict):
+        raise ConfigError([(path, "must be a table")])
+    errors: list[tuple[str, str]] = []
+    templates = templates or {}
+    template_errors = _template_errors(templates, "templates")
+    if template_errors:
+        raise ConfigError(template_errors)
+    interned: dict = {}
+    seen: dict = {}
+    heading = structure.get('heading', '')
+    if not isinstance(heading, str):
+        errors.append((f"{path}.heading", "must be a string"))
+    normalized = {'heading': heading, 'menu': []}
+
+    # Breadth-first walk so deeply nested or very large menus can't hit the recursion limit
+    pending = deque([(structure.get('menu', []), f"{path}.menu", normalized['menu'])])
+    while pending:
+        items, items_path, out = pending.popleft()
+        if not isinstance(items, list):
+            errors.append((items_path, "must be an array of tables"))
+            continue
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append((f"{items_path}[{index}]", "must be a table"))
+                continue
+            if memo is not None:
+                cached = memo.get(id(item))
+                if cached is not None and cached[0] is item:
+                    seen[id(item)] = cached
+                    out.append(cached[1])
+                    continue
+                source = item
+            if 'template' in item:
+                if item['template'] not in templates:
+                    errors.append((f"{items_path}[{index}].template", f"unknown template {item['template']!r}"))
+                    continue
+                item = _apply_template(item, templates)
+            name = item.get('name')
+            if name is None:
+                errors.append((f"{items_path}[{index}]", "missing required key 'name'"))
+            elif not _is_text(name):
+                errors.append((f"{items_path}[{index}].name", "must be a non-empty string"))
+            entry = {'name': name}
+            if 'submenu' in item:
+                if 'command' in item:
+                    errors.append((f"{items_path}[{index}]", "cannot have both 'submenu' and 'command'"))
+                else:
+                    entry['submenu'] = []
+                    pending.append((item['submenu'], f"{items_path}[{index}].submenu", entry['submenu']))
+            elif 'command' in item:
+                command = item['command']
+                problems = _command_problems(command)
+                if problems:
+                    # Paths are only formatted when there is something to report
+                    command_path = f"{items_path}[{index}].command"
+                    errors.extend((f"{command_path}.{key}" if key else command_path, message)
+                                  for key, message in problems)
+                else:
+                    command = dict(command)
+                    command.setdefault('working_dir', None)
+                entry['command'] = command
+            if 'submenu' not in entry:
+                entry = _intern(entry, interned)
+            if memo is not None:
+                # Keep the source item alive so its id can't be reused by another one
+                seen[id(source)] = (source, entry)
+            out.append(entry)
+
+    if errors:
+        raise ConfigError(errors)
+    if memo is not None:
+        memo.clear()
+        memo.update(seen)
+    return normalized
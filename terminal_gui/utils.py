@@ -1,24 +1,51 @@
 from __future__ import annotations
 
+import os
+from collections import deque
+
 import urwid
-import toml
 from .config import load_config, get_menu_colors
+from .fragments import load_config_parallel, load_config_with_includes
+from .palette import compile_palette
+
+_ui_calls = deque()
+_ui_pipe = None
 
 def exit_program(button=None):
     raise urwid.ExitMainLoop()
 
+def _run_ui_calls(data):
+    while _ui_calls:
+        func, args = _ui_calls.popleft()
+        func(*args)
+    return True
+
+def attach_main_loop(loop):
+    """Let worker threads hand UI updates to *loop* through :func:`call_in_ui`."""
+    global _ui_pipe
+    _ui_pipe = loop.watch_pipe(_run_ui_calls)
+
+def call_in_ui(func, *args):
+    """Run ``func(*args)`` in the urwid loop thread and redraw.
+
+    Safe to call from any thread. Without an attached loop (tests, headless
+    replay) the call runs immediately.
+    """
+    if _ui_pipe is None:
+        func(*args)
+        return
+    _ui_calls.append((func, args))
+    os.write(_ui_pipe, b"\n")
+
 def create_palette(colors):
-    return [
-        (None, colors.get('default_fg', 'black'), colors.get('default_bg', 'light gray')),
-        ("heading", colors.get('heading_fg', 'black'), colors.get('heading_bg', 'light gray')),
-        ("line", colors.get('line_fg', 'black'), colors.get('line_bg', 'light gray')),
-        ("options", colors.get('options_fg', 'black'), colors.get('options_bg', 'light gray')),
-        ("focus heading", colors.get('focus_heading_fg', 'white'), colors.get('focus_heading_bg', 'dark blue')),
-        ("focus line", colors.get('focus_line_fg', 'white'), colors.get('focus_line_bg', 'dark blue')),
-        ("focus options", colors.get('focus_options_fg', 'white'), colors.get('focus_options_bg', 'dark blue')),
-        ("selected", colors.get('selected_fg', 'white'), colors.get('selected_bg', 'dark blue')),
-    ]
-
-def load_menu_config(file_path):
-    with open(file_path, 'r') as file:
-        return toml.load(file)
\ No newline at end of file
+    """Return a 16 color palette for *colors*; see :func:`compile_palette` for other depths."""
+    return compile_palette(colors, 16)
+
+def load_menu_config(file_path, cache=None, workers=None):
+    """Load a menu config, expanding ``include`` fragments through *cache*.
+
+    With *workers* > 1 the config files are parsed in a process pool.
+    """
+    if workers and workers > 1:
+        return load_config_parallel(file_path, workers, cache)
+    return load_config_with_includes(file_path, cache)
\ No newline at end of file
@@ -0,0 +1,59 @@
+import pytest
+from terminal_gui import callables
+from terminal_gui.callables import (
+    callable_problems, find_callables, resolve_callable, run_callable, shutdown_pools, warm_process_pool,
+)
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    shutdown_pools()
+    yield
+    shutdown_pools()
+
+def test_resolve_callable():
+    """Test module:function specs resolve, including dotted attributes"""
+    import os.path
+    assert resolve_callable("os.path:join") is os.path.join
+    assert resolve_callable("os:path.join") is os.path.join
+    with pytest.raises(TypeError):
+        resolve_callable("os:sep")
+
+def test_run_callable_in_thread():
+    """Test callables run on the shared thread pool and report their result"""
+    messages = []
+    future = run_callable("operator:add", args=[1, 2], on_progress=lambda k, m: messages.append((k, m)))
+    assert future.result(5) == 3
+    assert messages == [("status", "running"), ("status", "done"), ("result", "3")]
+
+def test_run_callable_error():
+    """Test errors raised by the callable are reported"""
+    messages = []
+    future = run_callable("operator:truediv", args=[1, 0], on_progress=lambda k, m: messages.append((k, m)))
+    with pytest.raises(ZeroDivisionError):
+        future.result(5)
+    assert ("error", "ZeroDivisionError: division by zero") in messages
+
+def test_run_callable_in_warm_process_pool():
+    """Test process mode reuses the pre-warmed worker pool"""
+    warm_process_pool(["operator:add"], max_workers=1)
+    pool = callables._process_pool
+    assert pool is not None
+    assert run_callable("os:getpid", mode="process").result(10) == run_callable("os:getpid", mode="process").result(10)
+    assert callables._process_pool is pool
+
+def test_find_callables():
+    """Test callable commands are found at any depth"""
+    command = {'type': 'callable', 'value': 'json:dumps', 'mode': 'process'}
+    structure = {'menu': [
+        {'name': 'A', 'submenu': [{'name': 'B', 'command': command}]},
+        {'name': 'C', 'command': {'type': 'shell', 'value': 'ls'}},
+    ]}
+    assert find_callables(structure) == [command]
+
+def test_callable_problems():
+    """Test callable command validation"""
+    assert callable_problems({'value': 'pkg.mod:func', 'mode': 'process', 'args': [1]}) == []
+    keys = [key for key, _ in callable_problems(
+        {'value': 'no colon', 'mode': 'fork', 'args': 1, 'kwargs': [], 'working_dir': '/tmp'}
+    )]
+    assert keys == ['value', 'mode', 'args', 'kwargs', 'working_dir']
@@ -1,4 +1,6 @@
 import os
+import time
+from concurrent.futures import Future
 import pytest
 from terminal_gui.command_executor import CommandExecutor
 
@@ -31,4 +33,47 @@ def test_execute_invalid_command_type():
     """Test execution with invalid command type"""
     with pytest.raises(ValueError) as exc:
         CommandExecutor.execute_command("invalid", "test")
-    assert "Unsupported command type: invalid" in str(exc.value)
\ No newline at end of file
+    assert "Unsupported command type: invalid" in str(exc.value)
+
+def test_execute_pipeline_command(mocker):
+    """Test pipelines are started in the background with their options"""
+    mock_pipeline = mocker.patch('terminal_gui.pipeline.Pipeline')
+    steps = [{'name': 'build', 'type': 'shell', 'value': 'make'}]
+    result = CommandExecutor.execute_command("pipeline", steps, "/tmp", max_workers=2)
+    mock_pipeline.assert_called_once_with(steps, "/tmp", max_workers=2)
+    assert result is mock_pipeline.return_value.start.return_value
+
+def test_execute_remote_command(mocker):
+    """Test remote commands fan out through the connection pool"""
+    mock_pool = mocker.patch('terminal_gui.remote.default_pool')
+    result = CommandExecutor.execute_command("remote", "uptime", "/srv", hosts="web1", timeout=5)
+    mock_pool.return_value.start.assert_called_once_with(["web1"], "uptime", working_dir="/srv", timeout=5)
+    assert result is mock_pool.return_value.start.return_value
+
+def test_execute_callable_command(mocker):
+    """Test callable commands go to the worker pools"""
+    mock_run = mocker.patch('terminal_gui.callables.run_callable')
+    result = CommandExecutor.execute_command("callable", "pkg.mod:func", None, mode="process", args=[1])
+    mock_run.assert_called_once_with("pkg.mod:func", mode="process", args=[1])
+    assert result is mock_run.return_value
+
+def test_finished_commands_are_reaped(mocker):
+    """Test short commands are waited for and forgotten without anyone asking what is running"""
+    track = mocker.spy(CommandExecutor, '_track')
+    for _ in range(50):
+        CommandExecutor.execute_command("shell", "true")
+    processes = [call.args[0] for call in track.call_args_list]
+    deadline = time.monotonic() + 5
+    while any(process.returncode is None for process in processes) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert all(process.returncode == 0 for process in processes)
+    time.sleep(0.05)
+    assert not CommandExecutor._started.intersection(processes)
+
+def test_finished_futures_are_forgotten():
+    """Test a future is dropped, with its result, as soon as it completes"""
+    future = Future()
+    CommandExecutor._track(future)
+    assert future in CommandExecutor._started
+    future.set_result({'web1': (0, 'output')})
+    assert future not in CommandExecutor._started
@@ -0,0 +1,92 @@
+import os
+import pytest
+from terminal_gui.fragments import (
+    FragmentCache, expand_includes, load_config_parallel, load_config_with_includes,
+)
+
+MAIN = '''
+[menu_structure]
+heading = "Main"
+include = ["teams/*.toml"]
+
+[[menu_structure.menu]]
+name = "Local"
+command.type = "shell"
+command.value = "ls"
+'''
+
+@pytest.fixture
+def config_dir(tmp_path):
+    (tmp_path / "teams").mkdir()
+    (tmp_path / "main.toml").write_text(MAIN)
+    (tmp_path / "teams" / "a.toml").write_text(
+        '[[menu]]\nname = "Team A"\ninclude = "../extra.toml"\n'
+    )
+    (tmp_path / "teams" / "b.toml").write_text(
+        '[[menu]]\nname = "Team B"\ncommand.type = "shell"\ncommand.value = "b"\n'
+    )
+    (tmp_path / "extra.toml").write_text('[[menu]]\nname = "Extra"\n')
+    return tmp_path
+
+def touch(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_expand_includes_sorted(config_dir):
+    """Test glob includes expand in a stable order"""
+    paths = expand_includes(["teams/*.toml"], str(config_dir))
+    assert [os.path.basename(p) for p in paths] == ["a.toml", "b.toml"]
+
+def test_expand_includes_missing_file(config_dir):
+    """Test a missing plain include is an error"""
+    with pytest.raises(FileNotFoundError):
+        expand_includes("missing.toml", str(config_dir))
+
+def test_load_config_with_includes(config_dir):
+    """Test fragments are merged into the menu structure"""
+    config = load_config_with_includes(str(config_dir / "main.toml"), FragmentCache())
+    menu = config['menu_structure']['menu']
+    assert [item['name'] for item in menu] == ["Local", "Team A", "Team B"]
+    assert menu[1]['submenu'] == [{'name': 'Extra'}]
+    assert 'include' not in config['menu_structure']
+    assert 'include' not in menu[1]
+
+def test_only_changed_fragment_is_reparsed(config_dir, mocker):
+    """Test fragments are cached by mtime and unchanged ones keep their items"""
+    cache = FragmentCache()
+    main = str(config_dir / "main.toml")
+    first = load_config_with_includes(main, cache)['menu_structure']['menu']
+    team_a = cache.resolve_fragment(str(config_dir / "teams" / "a.toml"))
+
+    (config_dir / "teams" / "b.toml").write_text('[[menu]]\nname = "Team B2"\n')
+    touch(config_dir / "teams" / "b.toml", 10**18)
+    load = mocker.spy(__import__('toml'), 'load')
+    second = load_config_with_includes(main, cache)['menu_structure']['menu']
+
+    assert load.call_count == 1
+    assert [item['name'] for item in second] == ["Local", "Team A", "Team B2"]
+    assert cache.resolve_fragment(str(config_dir / "teams" / "a.toml")) is team_a
+    assert second[1] is first[1]
+
+def test_include_cycle(tmp_path):
+    """Test include cycles are reported"""
+    (tmp_path / "a.toml").write_text('include = "b.toml"\n')
+    (tmp_path / "b.toml").write_text('include = "a.toml"\n')
+    with pytest.raises(ValueError) as exc:
+        FragmentCache().resolve_fragment(str(tmp_path / "a.toml"))
+    assert "Include cycle" in str(exc.value)
+
+def test_load_config_parallel_matches_serial(config_dir):
+    """Test the parallel loader merges fragments in the same order"""
+    main = str(config_dir / "main.toml")
+    serial = load_config_with_includes(main, FragmentCache())
+    parallel = load_config_parallel(main, 2, FragmentCache())
+    assert parallel == serial
+
+def test_load_config_parallel_uses_cache(config_dir, mocker):
+    """Test files cached at their current mtime are not sent to the pool"""
+    cache = FragmentCache()
+    main = str(config_dir / "main.toml")
+    load_config_with_includes(main, cache)
+    pool = mocker.patch('terminal_gui.fragments.ProcessPoolExecutor')
+    load_config_parallel(main, 2, cache)
+    assert not pool.return_value.__enter__.return_value.submit.called
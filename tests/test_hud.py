@@ -0,0 +1,33 @@
+import urwid
+from terminal_gui.hud import HUDOverlay, MetricsHUD, hud_lines
+
+def test_hud_lines_cover_every_area():
+    """Test the HUD shows load time, builds, frames, latency, children and memory"""
+    text = "\n".join(hud_lines())
+    for label in ('config load', 'widgets', 'frame', 'key', 'children', 'memory'):
+        assert label in text
+
+def test_overlay_keeps_focus_on_the_menu():
+    """Test keys go to the menu and the panel is drawn over its top right corner"""
+    walker = urwid.SimpleFocusListWalker([urwid.Button(str(i)) for i in range(5)])
+    listbox = urwid.ListBox(walker)
+    overlay = HUDOverlay(listbox, urwid.Text("HUD"))
+    assert overlay.keypress((60, 5), 'down') is None
+    assert listbox.focus_position == 1
+    rows = [row.decode() for row in overlay.render((60, 5), focus=True).text]
+    assert rows[0].endswith("HUD" + " " * 41)
+    assert rows[0].startswith("< 0 ")
+
+def test_toggle(mocker):
+    """Test the toggle key shows the HUD, refreshes it on an alarm and hides it again"""
+    base = urwid.SolidFill('x')
+    loop = mocker.Mock(widget=base)
+    hud = MetricsHUD()
+    assert not hud.handle_key(loop, 'f3')
+    assert hud.handle_key(loop, 'f2')
+    assert isinstance(loop.widget, HUDOverlay) and hud.visible
+    assert 'config load' in hud.text.text
+    loop.set_alarm_in.assert_called_once()
+    hud.handle_key(loop, 'f2')
+    assert loop.widget is base and not hud.visible
+    loop.remove_alarm.assert_called_once()
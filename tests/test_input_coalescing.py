@@ -0,0 +1,52 @@
+import pytest
+from terminal_gui.input_coalescing import InputCoalescer
+
+def test_filter_merges_resize_storm():
+    """Test several resizes in one batch become one"""
+    coalescer = InputCoalescer()
+    keys = ['window resize', 'window resize', 'x', 'window resize']
+    assert coalescer.filter(keys, []) == ['window resize', 'x']
+    assert coalescer.dropped == 2
+
+def test_filter_shortens_repeated_navigation():
+    """Test held arrow keys and wheel scrolling don't pile up"""
+    coalescer = InputCoalescer(max_repeat=2)
+    wheel = ('mouse press', 5, 10, 3)
+    keys = ['down'] * 5 + ['up', wheel, wheel, wheel, ('mouse press', 5, 11, 3)]
+    assert coalescer.filter(keys, []) == ['down', 'down', 'up', wheel, wheel]
+
+def test_filter_keeps_typed_keys():
+    """Test keys that aren't navigation are never dropped"""
+    coalescer = InputCoalescer()
+    keys = ['a', 'a', 'enter', 'enter', ('mouse press', 1, 2, 2), ('mouse press', 1, 2, 2)]
+    assert coalescer.filter(keys, []) == keys
+
+def test_invalid_max_fps():
+    """Test the frame rate cap must be positive"""
+    with pytest.raises(ValueError):
+        InputCoalescer(max_fps=0)
+
+def test_draws_are_capped(mocker):
+    """Test redraws within one frame are deferred to a single draw"""
+    now = [100.0]
+    coalescer = InputCoalescer(max_fps=10, clock=lambda: now[0])
+    loop = mocker.Mock()
+    draw = loop.draw_screen
+    coalescer.attach(loop)
+
+    loop.draw_screen()
+    assert draw.call_count == 1
+    now[0] += 0.03
+    loop.draw_screen()
+    now[0] += 0.03
+    loop.draw_screen()
+    assert draw.call_count == 1
+    loop.set_alarm_in.assert_called_once()
+    assert loop.set_alarm_in.call_args[0][0] == pytest.approx(0.07)
+
+    # The alarm fires at the end of the frame and the loop redraws on idle
+    alarm_callback = loop.set_alarm_in.call_args[0][1]
+    alarm_callback(loop, None)
+    now[0] += 0.05
+    loop.draw_screen()
+    assert draw.call_count == 2
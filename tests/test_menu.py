@@ -1,6 +1,9 @@
+import os
 import pytest
 import urwid
-from terminal_gui.menu import Menu
+from terminal_gui.menu import Menu, main
+from terminal_gui.menu_layout import top
+from terminal_gui.schema import ConfigError
 
 def test_menu_initialization(temp_config_file, sample_config_data):
     """Test menu initialization"""
@@ -85,4 +88,87 @@ def test_exit_program(mocker, temp_config_file):
     """Test exit program"""
     menu = Menu(temp_config_file)
     with pytest.raises(urwid.ExitMainLoop):
-        menu.exit_program()
\ No newline at end of file
+        menu.exit_program()
+
+def test_menu_invalid_structure(tmp_path):
+    """Test malformed menu entries are reported at load time"""
+    config_file = tmp_path / "bad.toml"
+    config_file.write_text('[menu_structure]\nheading = "Main"\n[[menu_structure.menu]]\ncommand.type = "shell"\n')
+    with pytest.raises(ValueError) as exc:
+        Menu(str(config_file))
+    assert "menu_structure.menu[0]" in str(exc.value)
+
+def test_templates_share_widgets(tmp_path):
+    """Test items built from one template share a single widget"""
+    config_file = tmp_path / "templates.toml"
+    config_file.write_text(
+        'menu_type = "horizontal"\n'
+        '[templates.status]\nname = "Status"\ncommand = { type = "shell", value = "uptime" }\n'
+        '[menu_structure]\nheading = "Main"\n'
+        '[[menu_structure.menu]]\nname = "Web"\nsubmenu = [{ template = "status" }]\n'
+        '[[menu_structure.menu]]\nname = "DB"\nsubmenu = [{ template = "status" }]\n'
+    )
+    menu = Menu(str(config_file))
+    menu.create_top_widget()
+    web, db = (item['submenu'][0] for item in menu.menu_structure['menu'])
+    assert web is db
+    first, second = top.contents[0][0].base_widget.body[3:5]
+    assert first.menu.base_widget.body[3] is second.menu.base_widget.body[3]
+
+def write_team(path, name, mtime_ns):
+    path.write_text(
+        f'[[menu]]\nname = "{name}"\nsubmenu = [{{ name = "{name} status", '
+        f'command = {{ type = "shell", value = "uptime" }} }}]\n'
+    )
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_reload_reuses_unchanged_fragments(tmp_path):
+    """Test a reload rebuilds the items of a changed fragment and keeps the others"""
+    (tmp_path / "teams").mkdir()
+    config_file = tmp_path / "menu.toml"
+    config_file.write_text('menu_type = "horizontal"\n[menu_structure]\nheading = "Main"\ninclude = "teams/*.toml"\n')
+    write_team(tmp_path / "teams" / "a.toml", "A", 10**18)
+    write_team(tmp_path / "teams" / "b.toml", "B", 10**18)
+    menu = Menu(str(config_file))
+    menu.create_top_widget()
+    a, b = top.contents[0][0].base_widget.body[3:5]
+    a_items, b_items = (item['submenu'] for item in menu.menu_structure['menu'])
+    a_menu = a.menu
+    assert b.menu is not None and a.lazy_menu.done and b.lazy_menu.done
+
+    write_team(tmp_path / "teams" / "b.toml", "B2", 2 * 10**18)
+    menu.reload()
+    new_a, new_b = top.contents[0][0].base_widget.body[3:5]
+    assert menu.menu_structure['menu'][0]['submenu'] is a_items
+    assert menu.menu_structure['menu'][1]['submenu'] is not b_items
+    assert new_a is a and new_a.menu is a_menu
+    assert new_b is not b and new_b.caption == "B2"
+
+def test_failed_reload_keeps_menu(tmp_path):
+    """Test an invalid config on reload leaves the loaded menu in place"""
+    config_file = tmp_path / "menu.toml"
+    config_file.write_text('[menu_structure]\nheading = "Main"\n[[menu_structure.menu]]\nname = "Ok"\n')
+    menu = Menu(str(config_file))
+    structure = menu.menu_structure
+    config_file.write_text('[menu_structure]\nheading = "Main"\n[[menu_structure.menu]]\nname = 1\n')
+    os.utime(config_file, ns=(10**18, 10**18))
+    with pytest.raises(ValueError):
+        menu.reload()
+    assert menu.menu_structure is structure
+
+def test_invalid_settings_reported_with_structure_errors(tmp_path):
+    """Test bad top-level settings are reported at load time together with menu errors"""
+    config_file = tmp_path / "menu.toml"
+    config_file.write_text('max_fps = "fast"\n[menu_structure]\nheading = "Main"\n[[menu_structure.menu]]\nname = 1\n')
+    with pytest.raises(ConfigError) as exc:
+        Menu(str(config_file))
+    assert [path for path, _ in exc.value.errors] == ['max_fps', 'menu_structure.menu[0].name']
+
+@pytest.mark.parametrize('option', ['--max-fps', '--max-repeat'])
+def test_non_positive_rate_options_rejected(option, capsys):
+    """Test a zero or negative frame rate or repeat count is an argparse error, not a traceback"""
+    for value in ('0', '-5'):
+        with pytest.raises(SystemExit) as exc:
+            main([option, value, 'missing.toml'])
+        assert exc.value.code == 2
+        assert f'{option}: must be positive' in capsys.readouterr().err
@@ -1,6 +1,8 @@
 import pytest
 import urwid
-from terminal_gui.menu_components import MenuButton, SubMenu, Choice, CommandChoice
+from terminal_gui.menu_components import MenuButton, SubMenu, Choice, CommandChoice, OutputBox
+from terminal_gui.menu_layout import HorizontalBoxes
+from terminal_gui.output_buffer import OutputBuffer, OutputPane
 
 @pytest.fixture
 def mock_menu_layout(mocker):
@@ -121,4 +123,56 @@ def test_command_choice_item_chosen_error(mock_menu_layout, mocker):
     assert isinstance(pile, urwid.Pile)
     text_widget = pile.contents[0][0]
     assert isinstance(text_widget, urwid.Text)
-    assert "Error executing command: Test error" in text_widget.text
\ No newline at end of file
+    assert "Error executing command: Test error" in text_widget.text
+
+def test_command_choice_pipeline_progress(mock_menu_layout, mocker):
+    """Test pipeline commands show live progress lines"""
+    mock_executor = mocker.patch('terminal_gui.menu_components.CommandExecutor')
+    mock_executor.PROGRESS_TYPES = ("pipeline",)
+    steps = [{'name': 'build', 'type': 'shell', 'value': 'make'}]
+
+    command_choice = CommandChoice("Release", "pipeline", steps, None, {'max_workers': 2})
+    command_choice.item_chosen(command_choice._w)
+
+    kwargs = mock_executor.execute_command.call_args[1]
+    assert kwargs['max_workers'] == 2
+    kwargs['on_progress']('build', 'running')
+
+    pile = mock_menu_layout.open_box.call_args[0][0].original_widget.original_widget
+    assert len(pile.contents) == 3  # Response text, progress and Ok button
+    assert "pipeline of 1 steps" in pile.contents[0][0].text
+    progress = pile.contents[1][0]
+    assert progress.lines['build'].text == "  build: running"
+
+def test_command_choice_stream_output(mock_menu_layout, mocker):
+    """Test streamed commands get a scrolling output pane"""
+    mock_executor = mocker.patch('terminal_gui.menu_components.CommandExecutor')
+    mock_executor.PROGRESS_TYPES = ()
+
+    command_choice = CommandChoice("Logs", "shell", "tail -f log", None, {'stream': True, 'max_lines': 50})
+    command_choice.item_chosen(command_choice._w)
+
+    kwargs = mock_executor.execute_command.call_args[1]
+    assert set(kwargs) == {'on_output'}
+    pile = mock_menu_layout.open_box.call_args[0][0].original_widget
+    assert isinstance(pile, urwid.Pile)
+    pane = pile.contents[1][0]
+    assert isinstance(pane, OutputPane)
+    assert pane.buffer.max_lines == 50
+
+def test_menu_buttons_share_caption_widget():
+    """Test buttons with the same caption reuse one laid out caption"""
+    first = MenuButton("Restart", lambda x: None)
+    second = MenuButton("Restart", lambda x: None)
+    assert first._w is second._w
+    assert MenuButton(["Sub", "..."], lambda x: None)._w is not MenuButton(["Sub", "..."], lambda x: None)._w
+
+def test_output_box_closed_when_dismissed():
+    """Test a streamed command's box frees its output once the layout drops it for good"""
+    pane = OutputPane(OutputBuffer(spill=True))
+    boxes = HorizontalBoxes()
+    boxes.open_box(urwid.ListBox([urwid.Text("menu")]))
+    boxes.open_box(urwid.AttrMap(OutputBox(urwid.Text("running"), pane, urwid.Text("Ok")), "options"))
+    assert not pane.buffer._closed
+    boxes.go_back()
+    assert pane.buffer._closed and pane.buffer._spill.file.closed
@@ -0,0 +1,157 @@
+import socket
+import subprocess
+import time
+import pytest
+from terminal_gui.command_executor import CommandExecutor
+from terminal_gui.metrics import MetricsRegistry, MetricsServer, instrument_loop
+from terminal_gui import metrics
+
+def test_exposition_format():
+    """Test counters, labelled counters, gauges and histograms in Prometheus text format"""
+    registry = MetricsRegistry()
+    registry.counter('app_events_total', 'Events').inc(3)
+    registry.counter('app_built_total', 'Built', ('kind',)).labels(kind='item').inc()
+    gauge = registry.gauge('app_memory_bytes', 'Memory')
+    gauge.set_function(lambda: 1024)
+    histogram = registry.histogram('app_seconds', 'Time', buckets=(0.1, 1))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    text = registry.exposition()
+    assert '# TYPE app_events_total counter\napp_events_total 3\n' in text
+    assert 'app_built_total{kind="item"} 1\n' in text
+    assert 'app_memory_bytes 1024\n' in text
+    assert 'app_seconds_bucket{le="0.1"} 1\napp_seconds_bucket{le="1"} 2\napp_seconds_bucket{le="+Inf"} 2\n' in text
+    assert 'app_seconds_sum 0.55\napp_seconds_count 2\n' in text
+
+def test_duplicate_and_bad_labels():
+    """Test a metric name can only be registered once and labels must match"""
+    registry = MetricsRegistry()
+    counter = registry.counter('app_total', 'x', ('kind',))
+    with pytest.raises(ValueError):
+        registry.counter('app_total', 'x')
+    with pytest.raises(ValueError):
+        counter.labels(type='y')
+
+def test_only_gauge_children_can_be_set():
+    """Test labelled gauges can be set while labelled counters only go up"""
+    registry = MetricsRegistry()
+    gauge = registry.gauge('app_queue', 'Queue', ('name',))
+    gauge.labels(name='jobs').set(4)
+    assert gauge.value(name='jobs') == 4
+    counter = registry.counter('app_total', 'x', ('kind',)).labels(kind='item')
+    assert not hasattr(counter, 'set')
+
+def test_histogram_quantile():
+    """Test quantiles are interpolated inside their bucket"""
+    histogram = MetricsRegistry().histogram('app_seconds', 'Time', buckets=(1, 2, 4))
+    assert histogram.quantile(0.5) == 0.0
+    for value in (0.5, 1.5, 1.5, 3):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(1.0) == pytest.approx(4)
+
+def test_write_textfile(tmp_path):
+    """Test the textfile export is complete and leaves no temporary file"""
+    registry = MetricsRegistry()
+    registry.gauge('app_up', 'Up').set(1)
+    path = tmp_path / 'menu.prom'
+    registry.write_textfile(str(path))
+    assert path.read_text().endswith('app_up 1\n')
+    assert [p.name for p in tmp_path.iterdir()] == ['menu.prom']
+
+def test_server_answers_raw_and_http(tmp_path):
+    """Test the unix socket serves plain text, or HTTP when asked for it"""
+    registry = MetricsRegistry()
+    registry.gauge('app_up', 'Up').set(1)
+    path = str(tmp_path / 'metrics.sock')
+    server = MetricsServer(path, registry)
+
+    def fetch(request):
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(path)
+            if request:
+                client.sendall(request)
+            data = b''
+            while chunk := client.recv(4096):
+                data += chunk
+        return data.decode()
+
+    try:
+        assert fetch(b'').endswith('app_up 1\n')
+        response = fetch(b'GET /metrics HTTP/1.0\r\n\r\n')
+        assert response.startswith('HTTP/1.0 200 OK\r\n')
+        assert response.endswith('\r\n\r\n' + registry.exposition())
+    finally:
+        server.close()
+
+def test_instrument_loop(mocker):
+    """Test frames are timed and each input batch's latency ends at the next frame"""
+    loop = mocker.Mock()
+    frames = metrics.FRAME_RENDER_SECONDS.count
+    latencies = metrics.INPUT_LATENCY_SECONDS.count
+    instrument_loop(loop)
+    loop.process_input(['down'])
+    loop.process_input(['down'])
+    loop.draw_screen()
+    loop.draw_screen()
+    assert metrics.FRAME_RENDER_SECONDS.count == frames + 2
+    assert metrics.INPUT_LATENCY_SECONDS.count == latencies + 1
+
+def test_child_processes_are_counted():
+    """Test started commands count as children until they exit"""
+    started = metrics.COMMANDS_STARTED.value(type='shell')
+    process = CommandExecutor.execute_command('shell', 'sleep 0.3', on_output=lambda text: None)
+    assert process in CommandExecutor.running()
+    assert metrics.CHILD_PROCESSES.value() >= 1
+    assert metrics.COMMANDS_STARTED.value(type='shell') == started + 1
+    process.wait()
+    time.sleep(0.05)
+    assert process not in CommandExecutor.running()
+
+def test_waited_children_are_counted(mocker, tmp_path):
+    """Test pipeline steps, ssh clients and callable workers count as children"""
+    from terminal_gui.pipeline import Pipeline
+    from terminal_gui.remote import SSHConnectionPool
+    base = metrics.CHILD_PROCESSES.value()
+    during = []
+
+    def run(args, **kwargs):
+        during.append(metrics.CHILD_PROCESSES.value())
+        return subprocess.CompletedProcess(args, 0, stdout="")
+
+    mocker.patch('terminal_gui.pipeline.subprocess.run', side_effect=run)
+    mocker.patch('terminal_gui.remote.subprocess.run', side_effect=run)
+    Pipeline([{'name': 'build', 'type': 'shell', 'value': 'make'}]).run()
+    pool = SSHConnectionPool(control_dir=str(tmp_path))
+    pool.run('web1', 'uptime')
+    assert during == [base + 1] * 3  # the step, the master and the command
+    assert metrics.CHILD_PROCESSES.value() == base
+
+    alive = mocker.Mock(is_alive=lambda: True)
+    mocker.patch('terminal_gui.callables._process_pool', mocker.Mock(_processes={1: alive, 2: alive}))
+    assert metrics.CHILD_PROCESSES.value() == base + 2
+
+def test_server_only_replaces_sockets(tmp_path):
+    """Test a stale socket is replaced but a regular file at the path is not touched"""
+    path = tmp_path / "metrics.sock"
+    path.write_text("data")
+    with pytest.raises(FileExistsError):
+        MetricsServer(str(path), MetricsRegistry())
+    assert path.read_text() == "data"
+
+    path.unlink()
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    server = MetricsServer(str(path), MetricsRegistry())
+    server.close()
+    assert not path.exists()
+
+def test_server_close_leaves_replaced_path(tmp_path):
+    """Test closing doesn't remove a file that took the socket's place"""
+    path = tmp_path / "metrics.sock"
+    server = MetricsServer(str(path), MetricsRegistry())
+    path.unlink()
+    path.write_text("data")
+    server.close()
+    assert path.read_text() == "data"
@@ -0,0 +1,123 @@
+import threading
+import time
+import urwid
+from terminal_gui.command_executor import CommandExecutor
+from terminal_gui.output_buffer import OutputBuffer, OutputPane, OutputWalker
+
+def test_write_batches_until_flush(mocker):
+    """Test writes are queued and flushed once per batch"""
+    scheduled = []
+    mocker.patch('terminal_gui.output_buffer.call_in_ui', side_effect=lambda func: scheduled.append(func))
+    buffer = OutputBuffer()
+    buffer.write("one\ntw")
+    buffer.write("o\nthree")
+    assert len(scheduled) == 1
+    assert len(buffer) == 0
+    assert scheduled[0]() == 2
+    assert [buffer[i] for i in range(buffer.start, buffer.end)] == ["one", "two"]
+    buffer.write("\n")
+    assert len(scheduled) == 2
+
+def test_line_cap_drops_oldest():
+    """Test the line cap keeps only the newest lines"""
+    buffer = OutputBuffer(max_lines=3)
+    buffer.write("".join(f"{i}\n" for i in range(10)))
+    assert (buffer.start, buffer.end) == (7, 10)
+    assert buffer[9] == "9"
+
+def test_byte_cap_drops_oldest():
+    """Test the size cap bounds the text held in memory"""
+    buffer = OutputBuffer(max_bytes=10)
+    buffer.write("aaaa\nbbbb\ncccc\n")
+    assert buffer.start == 1
+    assert [buffer[1], buffer[2]] == ["bbbb", "cccc"]
+
+def test_endless_line_is_cut():
+    """Test output without newlines is cut into lines instead of growing without bound"""
+    buffer = OutputBuffer(max_bytes=100)
+    for _ in range(1000):
+        buffer.write("x" * 1000)
+    assert len(buffer._partial) < 100
+    assert len(buffer) == 1 and buffer[buffer.start] == "x" * 99
+
+def test_writers_wait_for_flush(mocker):
+    """Test a writer thread blocks once max_pending characters are queued, until a flush"""
+    mocker.patch('terminal_gui.output_buffer.call_in_ui')
+    buffer = OutputBuffer(max_pending=100)
+    writer = threading.Thread(target=lambda: [buffer.write("x" * 60) for _ in range(3)])
+    writer.start()
+    writer.join(0.2)
+    assert writer.is_alive() and buffer._pending_chars == 120
+    buffer.flush()
+    writer.join(5)
+    assert not writer.is_alive() and buffer._pending_chars == 60
+
+def test_spill_keeps_scrollback():
+    """Test evicted lines can still be read back from the spill file"""
+    buffer = OutputBuffer(max_lines=2, spill=True)
+    buffer.write("".join(f"line {i}\n" for i in range(5)))
+    buffer.write("more\n")
+    assert (buffer.start, buffer.end) == (0, 6)
+    assert [buffer[i] for i in range(6)] == ["line 0", "line 1", "line 2", "line 3", "line 4", "more"]
+    assert len(buffer._lines) == 2
+    buffer.close()
+
+def test_spill_is_capped():
+    """Test the spill file drops its oldest half when full"""
+    buffer = OutputBuffer(max_lines=1, spill=True, max_spill_bytes=50)
+    buffer.write("".join(f"{i:04d}\n" for i in range(20)))
+    assert buffer.start > 0
+    assert buffer[buffer.start] == f"{buffer.start:04d}"
+    assert buffer[19] == "0019"
+    buffer.close()
+
+def test_walker_builds_visible_lines_only():
+    """Test the ListBox only asks the walker for the visible lines"""
+    buffer = OutputBuffer()
+    buffer.write("".join(f"{i}\n" for i in range(1000)))
+    walker = OutputWalker(buffer)
+    listbox = urwid.ListBox(walker)
+    listbox.render((20, 5), focus=True)
+    assert len(walker._widgets) <= 10
+
+def test_pane_follows_new_output():
+    """Test the pane keeps the newest line in view while at the bottom"""
+    pane = OutputPane(OutputBuffer())
+    pane.write("a\nb\n")
+    assert pane.walker.focus == 1
+    pane.write("c\n")
+    assert pane.walker.focus == 2
+    pane.keypress((20, 2), 'up')
+    scrolled_to = pane.walker.focus
+    assert scrolled_to < 2
+    pane.write("d\n")
+    assert pane.walker.focus == scrolled_to
+
+def test_streamed_command(tmp_path):
+    """Test streamed command output reaches the callback"""
+    chunks = []
+    process = CommandExecutor.execute_command(
+        "shell", "printf 'x\\ny'", str(tmp_path), on_output=chunks.append
+    )
+    process.wait()
+    deadline = time.monotonic() + 5
+    while not any('exited' in chunk for chunk in chunks) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "".join(chunks) == "x\ny\n[exited with status 0]\n"
+
+def test_close_releases_spill_and_writers(mocker):
+    """Test closing frees the spill file, drops later output and lets blocked writers go"""
+    mocker.patch('terminal_gui.output_buffer.call_in_ui')
+    buffer = OutputBuffer(max_lines=1, spill=True, max_pending=10)
+    buffer.write("a\nb\nc\n")
+    buffer.flush()
+    spill_file = buffer._spill.file
+    writer = threading.Thread(target=lambda: [buffer.write("x" * 10) for _ in range(3)])
+    writer.start()
+    writer.join(0.2)
+    assert writer.is_alive()
+    buffer.close()
+    writer.join(5)
+    assert not writer.is_alive()
+    assert spill_file.closed
+    assert buffer.flush() == 0
@@ -0,0 +1,95 @@
+import pytest
+from terminal_gui.palette import (
+    TRUE_COLOR, compile_palette, detect_color_depth, nearest_color,
+    resolve_menu_colors, validate_color,
+)
+
+@pytest.fixture
+def clear_depth_cache():
+    detect_color_depth.cache_clear()
+    yield
+    detect_color_depth.cache_clear()
+
+def test_detect_color_depth(monkeypatch, clear_depth_cache):
+    """Test color depth detection from the environment"""
+    monkeypatch.setenv('COLORTERM', '')
+    monkeypatch.setenv('TERM', 'xterm-256color')
+    assert detect_color_depth() == 256
+
+def test_detect_color_depth_truecolor(monkeypatch, clear_depth_cache):
+    """Test true color detection"""
+    monkeypatch.setenv('COLORTERM', 'truecolor')
+    assert detect_color_depth() == TRUE_COLOR
+
+def test_detect_color_depth_is_cached(monkeypatch, clear_depth_cache):
+    """Test color depth is only detected once"""
+    monkeypatch.setenv('COLORTERM', '')
+    monkeypatch.setenv('TERM', 'xterm')
+    assert detect_color_depth() == 16
+    monkeypatch.setenv('TERM', 'xterm-256color')
+    assert detect_color_depth() == 16
+
+def test_nearest_color():
+    """Test hex colors map to the nearest color for each depth"""
+    assert nearest_color('#ff0000', 16) == 'light red'
+    assert nearest_color('#800000', 16) == 'dark red'
+    assert nearest_color('#ff0000', 256) == 'h196'
+    assert nearest_color('#808080', 256) == 'h244'
+    assert nearest_color('#ff0000', 88) == 'h64'
+    assert nearest_color('#f00', TRUE_COLOR) == '#ff0000'
+
+def test_validate_color():
+    """Test color validation"""
+    validate_color('dark blue')
+    validate_color('#12ab34')
+    validate_color('white,bold')
+    validate_color('h202')
+    validate_color('g50')
+    validate_color('g#a8')
+    for bad in ('purple', '#12345', 'white,shiny', 3, 'h256', 'g101', 'hx'):
+        with pytest.raises(ValueError):
+            validate_color(bad)
+
+def test_compile_palette_16_colors():
+    """Test palette compilation for a 16 color terminal"""
+    palette = compile_palette({'heading_fg': '#ff0000'}, 16)
+    assert palette[0] == (None, 'black', 'light gray')
+    assert palette[1] == ('heading', 'light red', 'light gray')
+
+def test_compile_palette_high_colors():
+    """Test palette compilation keeps a 16 color fallback"""
+    palette = compile_palette({'heading_fg': '#ff0000,bold'}, 256)
+    assert palette[1] == ('heading', 'light red,bold', 'light gray', None, 'h196,bold', 'light gray')
+
+def test_compile_palette_urwid_high_color_specs():
+    """Test urwid hN/gN specs pass through on 256 colors and map down elsewhere"""
+    palette = compile_palette({'heading_fg': 'h196', 'heading_bg': 'g100'}, 256)
+    assert palette[1] == ('heading', 'light red', 'white', None, 'h196', 'g100')
+    assert compile_palette({'heading_fg': 'h196'}, 16)[1] == ('heading', 'light red', 'light gray')
+    assert compile_palette({'heading_fg': 'h196'}, 88)[1][4] == 'h64'
+
+def test_compile_palette_invalid_color():
+    """Test invalid colors report their key"""
+    with pytest.raises(ValueError) as exc:
+        compile_palette({'options_bg': 'not a color'}, 16)
+    assert 'menu_colors.options_bg' in str(exc.value)
+
+def test_compile_palette_background_attributes():
+    """Test attributes on a background color are reported instead of failing in urwid"""
+    with pytest.raises(ValueError) as exc:
+        compile_palette({'options_bg': 'dark blue,bold'}, 256)
+    assert 'menu_colors.options_bg' in str(exc.value)
+    compile_palette({'options_fg': 'dark blue,bold'}, 256)
+
+def test_resolve_menu_colors_theme(tmp_path):
+    """Test theme files are merged under the config colors"""
+    (tmp_path / 'theme.toml').write_text('[menu_colors]\nheading_fg = "yellow"\noptions_fg = "white"\n')
+    config = {'theme': 'theme.toml', 'menu_colors': {'options_fg': '#00ff00'}}
+    colors = resolve_menu_colors(config, str(tmp_path))
+    assert colors == {'heading_fg': 'yellow', 'options_fg': '#00ff00'}
+
+def test_resolve_menu_colors_invalid_theme(tmp_path):
+    """Test invalid theme colors are caught at load time"""
+    (tmp_path / 'theme.toml').write_text('[menu_colors]\nheading_fg = "#zzzzzz"\n')
+    with pytest.raises(ValueError):
+        resolve_menu_colors({'theme': 'theme.toml'}, str(tmp_path))
@@ -0,0 +1,56 @@
+import time
+from terminal_gui.pipeline import Pipeline, pipeline_problems
+
+def step(name, value, needs=None):
+    data = {'name': name, 'type': 'shell', 'value': value}
+    if needs:
+        data['needs'] = needs
+    return data
+
+def test_pipeline_runs_in_dependency_order(tmp_path):
+    """Test steps run after the steps they need"""
+    log = tmp_path / "log"
+    steps = [
+        step('deploy', f'echo deploy >> {log}', ['test']),
+        step('build', f'echo build >> {log}'),
+        step('test', f'echo test >> {log}', ['build']),
+    ]
+    status = Pipeline(steps, str(tmp_path)).run()
+    assert status == {'deploy': 'ok', 'build': 'ok', 'test': 'ok'}
+    assert log.read_text().split() == ['build', 'test', 'deploy']
+
+def test_pipeline_runs_independent_steps_in_parallel(tmp_path):
+    """Test independent steps share the worker pool"""
+    steps = [step('a', 'sleep 0.3'), step('b', 'sleep 0.3'), step('c', 'sleep 0.3')]
+    start = time.monotonic()
+    Pipeline(steps, str(tmp_path), max_workers=3).run()
+    assert time.monotonic() - start < 0.8
+
+def test_pipeline_skips_downstream_of_failure(tmp_path):
+    """Test a failure skips dependent steps but not independent ones"""
+    steps = [
+        step('build', 'echo broken; exit 2'),
+        step('test', 'true', ['build']),
+        step('deploy', 'true', ['test']),
+        step('lint', 'true'),
+    ]
+    messages = []
+    pipeline = Pipeline(steps, str(tmp_path), on_progress=lambda name, msg: messages.append((name, msg)))
+    status = pipeline.start().wait(5)
+    assert status == {'build': 'failed', 'test': 'skipped', 'deploy': 'skipped', 'lint': 'ok'}
+    assert not pipeline.succeeded
+    build_messages = [msg for name, msg in messages if name == 'build']
+    assert build_messages[:2] == ['pending', 'running']
+    assert build_messages[-1].startswith('failed (exit 2') and build_messages[-1].endswith(': broken')
+    assert ('deploy', 'skipped (build failed)') in messages
+
+def test_pipeline_problems():
+    """Test pipeline validation"""
+    assert pipeline_problems({'value': [step('a', 'true'), step('b', 'true', ['a'])]}) == []
+    assert pipeline_problems({'value': []}) == [('value', 'must be a non-empty array of step tables')]
+    problems = pipeline_problems({'value': [step('a', 'true', ['missing']), step('a', 'true')]})
+    assert ('value[1].name', "duplicate step name 'a'") in problems
+    problems = pipeline_problems({'value': [step('a', 'true', ['b']), step('b', 'true', ['a'])]})
+    assert problems == [('value', 'steps have a dependency cycle')]
+    problems = pipeline_problems({'value': [{'name': 'a', 'type': 'pipeline', 'value': 'x'}], 'max_workers': 0})
+    assert [key for key, _ in problems] == ['max_workers', 'value[0].type']
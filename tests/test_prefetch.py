@@ -0,0 +1,96 @@
+import itertools
+import pytest
+import urwid
+from terminal_gui.menu_components import Choice, LazyMenu, SubMenu
+from terminal_gui.menu_types import create_cascading_menu, create_horizontal_menu
+from terminal_gui.prefetch import Prefetcher
+from terminal_gui.schema import validate_menu_structure
+
+def counting_clock():
+    """A clock that advances one millisecond per call"""
+    ticks = itertools.count()
+    return lambda: next(ticks) / 1000
+
+def structure(groups=5, items=10):
+    return validate_menu_structure({'heading': 'Main', 'menu': [
+        {'name': f'Group {g}', 'submenu': [
+            {'name': f'Item {g}.{i}', 'command': {'type': 'shell', 'value': f'echo {i}'}}
+            for i in range(items)
+        ]}
+        for g in range(groups)
+    ]})
+
+def test_lazy_menu_builds_in_steps():
+    """Test a lazy menu builds part of its choices per step and assembles at the end"""
+    made = []
+    choices = (made.append(i) or urwid.Text(str(i)) for i in range(5))
+    lazy = LazyMenu(choices, urwid.Pile)
+    clock = counting_clock()
+    assert lazy.step(clock() + 0.002, clock) is False
+    assert made == [0, 1] and not lazy.done
+    menu = lazy.get()
+    assert made == [0, 1, 2, 3, 4]
+    assert isinstance(menu, urwid.Pile) and len(menu.contents) == 5
+    assert lazy.get() is menu
+
+def test_submenu_is_built_on_first_open():
+    """Test a submenu given a generator doesn't build its choices until needed"""
+    made = []
+    submenu = SubMenu("Lazy", (made.append(i) or Choice(f"Choice {i}") for i in range(3)))
+    assert made == []
+    assert len(submenu.menu.original_widget.body) == 7
+    assert made == [0, 1, 2]
+
+def test_targets_focused_item_then_siblings():
+    """Test the focused submenu is queued first, then its neighbours nearest first"""
+    top = create_horizontal_menu(structure())
+    body = top.contents[0][0].base_widget.body
+    top.contents[0][0].base_widget.focus_position = 5  # Group 2
+    targets = Prefetcher(max_siblings=1).targets(top)
+    assert targets == [body[5].lazy_menu, body[6].lazy_menu, body[4].lazy_menu]
+    body[5].menu
+    assert Prefetcher(max_siblings=1).targets(top) == [body[6].lazy_menu, body[4].lazy_menu]
+
+def test_step_keeps_to_budget():
+    """Test one step builds no longer than the budget, and later steps finish the job"""
+    top = create_horizontal_menu(structure(groups=2, items=10))
+    top.contents[0][0].base_widget.focus_position = 3
+    prefetcher = Prefetcher(budget_ms=4, clock=counting_clock())
+    prefetcher.queue = prefetcher.targets(top)
+    assert prefetcher.step() is True
+    assert prefetcher.built == 0
+    while prefetcher.step():
+        pass
+    assert prefetcher.built == 2
+
+def test_cascading_submenus_are_prefetched():
+    """Test cascading submenus, nested ones included, are only built when opened or prefetched"""
+    menu = create_cascading_menu(validate_menu_structure({'heading': 'Main', 'menu': [
+        {'name': 'Outer', 'submenu': [{'name': 'Inner', 'submenu': [{'name': 'Leaf'}]}]},
+    ]}))
+    prefetcher = Prefetcher()
+    (outer,) = prefetcher.targets(menu)
+    prefetcher.queue = [outer]
+    prefetcher.step()
+    assert outer.done
+    inner_button = outer.get().body[2].base_widget
+    assert not inner_button.lazy_menu.done
+
+def test_attach_runs_one_slice_per_idle(mocker):
+    """Test going idle schedules a prefetch slice, and the slice builds the focused submenu"""
+    top = create_horizontal_menu(structure(groups=1))
+    loop = mocker.Mock(widget=top)
+    prefetcher = Prefetcher()
+    prefetcher.attach(loop)
+    idle = loop.event_loop.enter_idle.call_args[0][0]
+    idle()
+    idle()
+    assert loop.set_alarm_in.call_count == 1
+    delay, run = loop.set_alarm_in.call_args[0]
+    run(loop)
+    assert top.contents[0][0].base_widget.body[3].lazy_menu.done
+
+def test_invalid_budget():
+    """Test the budget must be positive"""
+    with pytest.raises(ValueError):
+        Prefetcher(budget_ms=0)
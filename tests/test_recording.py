@@ -0,0 +1,87 @@
+import json
+import pytest
+from terminal_gui.command_executor import CommandExecutor
+from terminal_gui.recording import SessionRecorder, load_recording, percentile, replay, summarize
+
+CONFIG = '''
+menu_type = "horizontal"
+
+[menu_structure]
+heading = "Main"
+
+[[menu_structure.menu]]
+name = "Tools"
+[[menu_structure.menu.submenu]]
+name = "Build"
+command.type = "shell"
+command.value = "make"
+'''
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "menu.toml"
+    path.write_text(CONFIG)
+    return str(path)
+
+@pytest.fixture
+def fake_loop(mocker):
+    loop = mocker.Mock()
+    loop.screen_size = (80, 24)
+    loop.screen.get_cols_rows.return_value = (100, 30)
+    return loop
+
+def test_recorder_writes_events(tmp_path, fake_loop):
+    """Test the recorder writes a header and one event per frame"""
+    path = tmp_path / "session.jsonl"
+    process_input = fake_loop.process_input
+    with SessionRecorder(str(path), "menu.toml", "horizontal") as recorder:
+        recorder.attach(fake_loop)
+        fake_loop.process_input(['down'])
+        fake_loop.process_input([('mouse press', 1, 3, 4)])
+        fake_loop.draw_screen()
+        fake_loop.draw_screen()
+        fake_loop.process_input(['window resize'])
+        fake_loop.draw_screen()
+
+    process_input.assert_called_with(['window resize'])
+    header, events = load_recording(str(path))
+    assert header['config'] == "menu.toml"
+    assert header['size'] == [80, 24]
+    assert len(events) == 2
+    assert events[0]['keys'] == ['down', ('mouse press', 1, 3, 4)]
+    assert events[0]['latency_ms'] >= events[0]['frame_ms']
+    assert events[1]['size'] == [100, 30]
+
+def test_percentile():
+    """Test nearest-rank percentiles"""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 99) == 0.0
+
+def test_summarize():
+    """Test latency summaries per key and overall"""
+    summary = summarize({'down': [1.0, 3.0], 'enter': [2.0]})
+    assert summary['all']['count'] == 3
+    assert summary['all']['max'] == 3.0
+    assert summary['down']['p50'] == 1.0
+
+def test_replay(tmp_path, config_file, mocker):
+    """Test replaying a recording headlessly without running commands"""
+    popen = mocker.patch('subprocess.Popen')
+    recording = tmp_path / "session.jsonl"
+    lines = [
+        {'config': config_file, 'menu_type': 'horizontal', 'size': [80, 24]},
+        {'t': 0, 'keys': ['down'], 'input_ms': 0},
+        {'t': 1, 'keys': ['enter'], 'input_ms': 0},
+        {'t': 2, 'keys': ['enter'], 'input_ms': 0},
+        {'t': 3, 'keys': ['window resize'], 'size': [120, 40], 'input_ms': 0},
+    ]
+    recording.write_text("\n".join(json.dumps(line) for line in lines))
+
+    summary = replay(str(recording))
+    assert summary['enter']['count'] == 2
+    assert summary['down']['count'] == 1
+    assert summary['all']['count'] == 3
+    assert not popen.called
+    assert CommandExecutor.dry_run is False
@@ -0,0 +1,94 @@
+import subprocess
+import pytest
+from terminal_gui.remote import HANDSHAKE_GRACE, SSHConnectionPool, remote_problems
+
+@pytest.fixture
+def fake_ssh(mocker):
+    """Stand in for ssh: '-N' opens a master socket, anything else runs the command"""
+    def run(args, **kwargs):
+        path = args[args.index("-o") + 1].split("=", 1)[1]
+        if "-N" in args:
+            open(path, "w").close()
+            return subprocess.CompletedProcess(args, 0)
+        if "-O" in args:
+            return subprocess.CompletedProcess(args, 0)
+        host = args[-2]
+        status = 1 if host == "bad" else 0
+        return subprocess.CompletedProcess(args, status, stdout=f"{host}: {args[-1]}\n")
+    return mocker.patch("terminal_gui.remote.subprocess.run", side_effect=run)
+
+@pytest.fixture
+def pool(tmp_path):
+    return SSHConnectionPool(control_dir=str(tmp_path))
+
+def masters_started(fake_ssh):
+    return [call.args[0] for call in fake_ssh.call_args_list if "-N" in call.args[0]]
+
+def test_run_reuses_master_connection(pool, fake_ssh):
+    """Test one master is opened per host and reused"""
+    assert pool.run("web1", "uptime") == (0, "web1: uptime\n")
+    assert pool.run("web1", "uptime") == (0, "web1: uptime\n")
+    assert len(masters_started(fake_ssh)) == 1
+    args = fake_ssh.call_args[0][0]
+    assert f"ControlPath={pool.control_path('web1')}" in args
+    assert "ControlMaster=no" in args and not any(arg.startswith("ControlPersist") for arg in args)
+    assert "ControlMaster=auto" in masters_started(fake_ssh)[0]
+
+def test_run_with_working_dir(pool, fake_ssh):
+    """Test the remote working directory is quoted into the command"""
+    pool.run("web1", "ls", working_dir="/srv/my app")
+    assert fake_ssh.call_args[0][0][-1] == "cd '/srv/my app' && ls"
+
+def test_master_failure(pool, mocker):
+    """Test connection failures are reported"""
+    mocker.patch("terminal_gui.remote.subprocess.run", return_value=subprocess.CompletedProcess([], 255))
+    with pytest.raises(ConnectionError):
+        pool.run("web1", "uptime")
+
+def test_fan_out(pool, fake_ssh):
+    """Test a command fans out to every host and reports progress"""
+    messages = []
+    results = pool.start(["web1", "bad", "web1"], "uptime",
+                         on_progress=lambda host, message: messages.append((host, message))).result(5)
+    assert results == {"web1": (0, "web1: uptime\n"), "bad": (1, "bad: uptime\n")}
+    assert ("web1", "ok: web1: uptime") in messages
+    assert ("bad", "failed (exit 1): bad: uptime") in messages
+    assert len(masters_started(fake_ssh)) == 2
+
+def test_close(pool, fake_ssh):
+    """Test closing the pool exits every master"""
+    pool.run("web1", "uptime")
+    pool.close()
+    exits = [call.args[0] for call in fake_ssh.call_args_list if "-O" in call.args[0]]
+    assert len(exits) == 1 and exits[0][-1] == "web1"
+
+def test_remote_problems():
+    """Test remote command validation"""
+    assert remote_problems({'value': 'uptime', 'hosts': 'web1'}) == []
+    assert remote_problems({'value': 'uptime', 'hosts': ['web1', 'web2'], 'timeout': 5}) == []
+    keys = [key for key, _ in remote_problems({'value': '', 'hosts': [], 'timeout': -1})]
+    assert keys == ['value', 'hosts', 'timeout']
+
+def test_master_connect_timeout(pool, mocker):
+    """Test a host that doesn't answer fails with a bounded wait instead of hanging"""
+    run = mocker.patch("terminal_gui.remote.subprocess.run",
+                       side_effect=subprocess.TimeoutExpired("ssh", 20))
+    with pytest.raises(ConnectionError):
+        pool.ensure_master("web1")
+    args, kwargs = run.call_args
+    assert "ConnectTimeout=10" in args[0]
+    assert kwargs['timeout'] == pool.connect_timeout + HANDSHAKE_GRACE
+    assert "web1" not in pool._masters
+
+def test_remote_problems_unknown_key():
+    """Test keys remote commands don't take are reported"""
+    assert [key for key, _ in remote_problems({'value': 'uptime', 'hosts': 'web1', 'max_workers': 4})] == ['max_workers']
+
+def test_start_reports_failure(pool, mocker):
+    """Test an error that stops the fan out reaches on_progress as well as the future"""
+    mocker.patch.object(pool, 'fan_out', side_effect=RuntimeError("no threads"))
+    messages = []
+    future = pool.start(["web1"], "uptime", on_progress=lambda key, message: messages.append((key, message)))
+    with pytest.raises(RuntimeError):
+        future.result(5)
+    assert messages == [("error", "RuntimeError: no threads")]
@@ -0,0 +1,155 @@
+import time
+import pytest
+from terminal_gui.schema import ConfigError, settings_problems, validate_menu_structure
+
+def test_validate_menu_structure_normalizes():
+    """Test a valid structure is normalized"""
+    structure = {
+        'heading': 'Main',
+        'menu': [
+            {'name': 'Dev', 'submenu': [
+                {'name': 'Build', 'command': {'type': 'shell', 'value': 'make'}},
+            ]},
+            {'name': 'About'},
+        ]
+    }
+    normalized = validate_menu_structure(structure)
+    assert normalized == {
+        'heading': 'Main',
+        'menu': [
+            {'name': 'Dev', 'submenu': [
+                {'name': 'Build', 'command': {'type': 'shell', 'value': 'make', 'working_dir': None}},
+            ]},
+            {'name': 'About'},
+        ]
+    }
+
+def test_validate_empty_structure():
+    """Test an empty structure normalizes to an empty menu"""
+    assert validate_menu_structure({}) == {'heading': '', 'menu': []}
+
+def test_validate_reports_all_errors_with_paths():
+    """Test every error is reported with its TOML path"""
+    structure = {
+        'heading': 'Main',
+        'menu': [
+            {'command': {'type': 'shell', 'value': 'ls'}},
+            {'name': 'Sub', 'submenu': [
+                {'name': 'Bad', 'command': {'type': 'telnet', 'value': 'x'}},
+                {'name': 'Dir', 'command': {'type': 'shell', 'value': 'ls', 'working_dir': 3}},
+            ]},
+        ]
+    }
+    with pytest.raises(ConfigError) as exc:
+        validate_menu_structure(structure)
+    paths = [path for path, _ in exc.value.errors]
+    assert paths == [
+        'menu_structure.menu[0]',
+        'menu_structure.menu[1].submenu[0].command.type',
+        'menu_structure.menu[1].submenu[1].command.working_dir',
+    ]
+    assert "missing required key 'name'" in str(exc.value)
+
+def test_validate_rejects_submenu_and_command():
+    """Test an item can't be both a submenu and a command"""
+    with pytest.raises(ConfigError):
+        validate_menu_structure({'menu': [{'name': 'x', 'submenu': [], 'command': {}}]})
+
+@pytest.mark.parametrize('unique', [False, True])
+def test_validate_large_structure_is_fast(unique):
+    """Test validation of a 100k node config stays well under a second, repeated commands or not"""
+    structure = {'heading': 'Big', 'menu': [
+        {'name': f'Group {i}', 'submenu': [
+            {'name': f'Item {j}', 'command': {'type': 'shell', 'value': f'echo {i} {j}' if unique else 'true'}}
+            for j in range(99)
+        ]}
+        for i in range(1000)
+    ]}
+    start = time.perf_counter()
+    validate_menu_structure(structure)
+    assert time.perf_counter() - start < 1.0
+
+def test_template_items_merge_overrides():
+    """Test an item starts from its template and overrides keys, command keys one by one"""
+    templates = {'restart': {'name': 'Restart', 'command': {'type': 'shell', 'value': 'systemctl restart app'}}}
+    structure = {'menu': [
+        {'template': 'restart'},
+        {'template': 'restart', 'command': {'value': 'systemctl restart db'}},
+    ]}
+    items = validate_menu_structure(structure, templates=templates)['menu']
+    assert items[0] == {'name': 'Restart', 'command': {'type': 'shell', 'value': 'systemctl restart app', 'working_dir': None}}
+    assert items[1]['command'] == {'type': 'shell', 'value': 'systemctl restart db', 'working_dir': None}
+
+def test_unknown_template_is_reported():
+    """Test a missing template is reported at the item's path"""
+    with pytest.raises(ConfigError) as exc:
+        validate_menu_structure({'menu': [{'template': 'nope'}]}, templates={})
+    assert exc.value.errors == [('menu_structure.menu[0].template', "unknown template 'nope'")]
+
+def test_identical_items_are_shared():
+    """Test identical leaf items normalize to one shared dict"""
+    def service(name):
+        return {'name': name, 'submenu': [
+            {'name': 'Logs', 'command': {'type': 'shell', 'value': 'journalctl'}},
+            {'name': 'Deploy', 'command': {'type': 'pipeline', 'value': [{'name': 'a', 'type': 'shell', 'value': 'true'}]}},
+        ]}
+    first, second = validate_menu_structure({'menu': [service('a'), service('b')]})['menu']
+    assert first['submenu'][0] is second['submenu'][0]
+    assert first['submenu'][1] is second['submenu'][1]
+    assert first is not second
+
+def test_memo_reuses_unchanged_items():
+    """Test items that are the same objects as last time keep their normalized form"""
+    kept = {'name': 'Kept', 'submenu': [{'name': 'Leaf', 'command': {'type': 'shell', 'value': 'ls'}}]}
+    memo = {}
+    first = validate_menu_structure({'menu': [kept, {'name': 'Old'}]}, memo=memo)
+    second = validate_menu_structure({'menu': [kept, {'name': 'New'}]}, memo=memo)
+    assert second['menu'][0] is first['menu'][0]
+    assert second['menu'][1] == {'name': 'New'}
+    assert len(memo) == 2
+
+def test_memo_unchanged_on_error():
+    """Test a failed validation leaves the memo as it was"""
+    memo = {}
+    validate_menu_structure({'menu': [{'name': 'Ok'}]}, memo=memo)
+    before = dict(memo)
+    with pytest.raises(ConfigError):
+        validate_menu_structure({'menu': [{'name': ''}]}, memo=memo)
+    assert memo == before
+
+def test_settings_problems():
+    """Test top-level settings are checked and reported by key"""
+    assert settings_problems(
+        {'max_fps': 30, 'max_repeat': 3, 'prefetch_budget_ms': 0, 'hud_key': 'f3', 'color_depth': 256}
+    ) == []
+    keys = [key for key, _ in settings_problems(
+        {'max_fps': 'fast', 'max_repeat': 0, 'prefetch_budget_ms': -1, 'hud_key': '', 'metrics_interval': 0,
+         'color_depth': 8}
+    )]
+    assert keys == ['max_fps', 'max_repeat', 'prefetch_budget_ms', 'hud_key', 'metrics_interval', 'color_depth']
+
+def test_similar_items_are_not_shared():
+    """Test items with the same name and command value but other differences stay apart"""
+    items = validate_menu_structure({'menu': [
+        {'name': 'Logs', 'command': {'type': 'shell', 'value': 'ls'}},
+        {'name': 'Logs', 'command': {'type': 'shell', 'value': 'ls', 'working_dir': '/var/log'}},
+        {'name': 'Logs', 'command': {'type': 'shell', 'value': 'ls', 'working_dir': '/var/log'}},
+    ]})['menu']
+    assert items[0] is not items[1]
+    assert items[1] is items[2]
+
+def test_unknown_pipeline_key_is_reported():
+    """Test a pipeline key the pipeline doesn't take fails at load time rather than on click"""
+    with pytest.raises(ConfigError) as exc:
+        validate_menu_structure({'menu': [{'name': 'Build', 'command': {
+            'type': 'pipeline', 'timeout': 5, 'value': [{'name': 'a', 'type': 'shell', 'value': 'true'}],
+        }}]})
+    assert [path for path, _ in exc.value.errors] == ['menu_structure.menu[0].command.timeout']
+
+def test_unknown_callable_key_is_reported():
+    """Test a callable key run_callable doesn't take fails at load time rather than on click"""
+    with pytest.raises(ConfigError) as exc:
+        validate_menu_structure({'menu': [{'name': 'Report', 'command': {
+            'type': 'callable', 'value': 'reports:build', 'timeout': 5,
+        }}]})
+    assert [path for path, _ in exc.value.errors] == ['menu_structure.menu[0].command.timeout']
@@ -1,7 +1,7 @@
 import pytest
 import toml
 import urwid
-from terminal_gui.utils import exit_program, create_palette, load_menu_config
+from terminal_gui.utils import exit_program, create_palette, load_menu_config, call_in_ui
 
 def test_exit_program():
     """Test exit program function"""
@@ -62,4 +62,10 @@ def test_load_menu_config_invalid_toml(tmp_path):
         f.write("invalid [ toml content")
     
     with pytest.raises(toml.TomlDecodeError):
-        load_menu_config(str(invalid_file))
\ No newline at end of file
+        load_menu_config(str(invalid_file))
+
+def test_call_in_ui_without_loop():
+    """Test UI calls run immediately when no main loop is attached"""
+    calls = []
+    call_in_ui(calls.append, 1)
+    assert calls == [1]